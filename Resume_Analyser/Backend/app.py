@@ -1,12 +1,19 @@
-from fastapi import FastAPI, UploadFile, File, Form
-from typing import List, Dict
+from fastapi import FastAPI, UploadFile, File, Form, Response, HTTPException
+from fastapi.responses import JSONResponse
+from typing import List, Optional, Set, Tuple
 from collections import Counter
-from tempfile import NamedTemporaryFile
-import pdfminer.high_level, docx2txt, re
-import spacy
-from sentence_transformers import SentenceTransformer, util
-from textstat import flesch_reading_ease
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio, multiprocessing, time, os, sys, hashlib
+import numpy as np
 from fastapi.middleware.cors import CORSMiddleware
+from doc_cache import DocumentCache
+from models import EMBED_MODEL, LazyModel, embedder_model
+from pipeline import document_kind, hold, noun_keywords_many, parse_documents, text_quality, warmup
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.candidate_index import CandidateIndex
+from shared.embed_cache import EmbeddingCache
+from shared.jd_profile import JDProfile, JDProfileStore, profile_id, valid_profile_id
+from shared.vector_index import VectorIndex
 
 app = FastAPI(title="Resume Analyzer API")
 
@@ -17,93 +24,276 @@ app.add_middleware(
     allow_methods=["*"], allow_headers=["*"]
 )
 
-# Load NLP models
-nlp = spacy.load("en_core_web_sm")
-embedder = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-
-# Basic skill taxonomy (extend later)
-SKILLS = {
-    "python": ["python", "pandas", "numpy"],
-    "ml": ["machine learning", "scikit-learn", "xgboost", "svm"],
-    "sql": ["sql", "postgres", "mysql"],
-    "cloud": ["aws", "gcp", "azure", "sagemaker", "bigquery"]
-}
-
-def _save_tmp(upload: UploadFile) -> str:
-    with NamedTemporaryFile(delete=False, suffix=upload.filename[upload.filename.rfind('.'):]) as tmp:
-        upload.file.seek(0)
-        tmp.write(upload.file.read())
-        return tmp.name
-
-def extract_text(upload: UploadFile) -> str:
-    name = upload.filename.lower()
-    tmp_path = _save_tmp(upload)
-    if name.endswith(".pdf"):
-        return pdfminer_high_level_extract(tmp_path)
-    elif name.endswith(".docx"):
-        return docx2txt.process(tmp_path) or ""
-    else:
-        upload.file.seek(0)
-        return upload.file.read().decode(errors="ignore")
-
-def pdfminer_high_level_extract(path: str) -> str:
-    try:
-        return pdfminer.high_level.extract_text(path) or ""
-    except Exception:
-        return ""
-
-def noun_keywords(text: str) -> Counter:
-    doc = nlp(text.lower())
-    toks = [t.lemma_ for t in doc if t.pos_ in {"NOUN", "PROPN"} and t.is_alpha and not t.is_stop]
-    return Counter(toks)
-
-def semantic_score(resume_text: str, jds: List[str]) -> float:
-    if not jds: return 0.0
-    r = embedder.encode(resume_text, convert_to_tensor=True)
-    sims = []
-    for jd in jds:
-        j = embedder.encode(jd, convert_to_tensor=True)
-        sims.append(float(util.cos_sim(r, j)))
-    return max(sims) * 100
-
-def map_readability(re: float) -> float:
-    return max(0.0, min(100.0, re))
-
-def extract_skills(text: str) -> Dict[str, List[str]]:
-    found, missing = [], []
-    t = text.lower()
-    for k, synonyms in SKILLS.items():
-        present = any(s in t for s in synonyms)
-        (found if present else missing).append(k)
-    return {"matched": found, "missing": missing}
-
-def ats_checks(text: str):
-    flags, low = [], text.lower()
-    if "skills" not in low: flags.append("Add a dedicated 'Skills' section.")
-    if not re.search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text): flags.append("Add a professional email.")
-    if not re.search(r"\b20\d{2}\b", text): flags.append("Add years for roles (YYYY).")
-    if "experience" not in low and "work" not in low: flags.append("Add 'Experience' section header.")
-    return flags
+# Models load lazily on first use (spaCy only inside the worker processes).
+# WARMUP_MODELS=1 loads them in the background at startup; see /ready.
+WARMUP_MODELS = os.getenv("WARMUP_MODELS", "0") == "1"
 
-@app.post("/analyze")
-async def analyze(resume: UploadFile = File(...), jds: List[str] = Form(...)):
-    res_text = extract_text(resume)
-    kw_res = noun_keywords(res_text)
-    kw_jd = noun_keywords(" ".join(jds))
+# Content-addressed embedding cache (memory LRU in front of a memory-mapped store)
+embed_cache_model = LazyModel("embedding_cache", lambda: EmbeddingCache(
+    EMBED_MODEL, embedder_model.get().get_sentence_embedding_dimension(),
+    directory=os.getenv("EMBED_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cache", "embeddings")),
+    max_entries=int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "100000")),
+    memory_entries=int(os.getenv("EMBED_CACHE_MEMORY_ENTRIES", "4096")),
+))
+
+# Upload limit: reject oversized files before they reach a parser
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", "10")) * 1024 * 1024)
+
+# Worker pools: processes for extraction/spaCy, threads for the torch encoder.
+# Requests beyond workers + queue depth get a 503 with Retry-After.
+ANALYZE_WORKERS = max(1, int(os.getenv("ANALYZE_WORKERS", str(os.cpu_count() or 2))))
+ANALYZE_QUEUE_DEPTH = max(0, int(os.getenv("ANALYZE_QUEUE_DEPTH", str(2 * ANALYZE_WORKERS))))
+ENCODE_THREADS = max(1, int(os.getenv("ENCODE_THREADS", "2")))
+RETRY_AFTER_S = os.getenv("RETRY_AFTER_S", "5")
+
+# every worker loads spaCy before its first task and reports its pid here
+warmup_reports = multiprocessing.get_context("spawn").SimpleQueue()
+cpu_pool = ProcessPoolExecutor(max_workers=ANALYZE_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=warmup, initargs=(warmup_reports,))
+encode_pool = ThreadPoolExecutor(max_workers=ENCODE_THREADS, thread_name_prefix="encode")
+
+# Parsed uploads (text + noun lemmas) keyed by sha256 of the raw bytes
+doc_cache = DocumentCache(
+    max_entries=int(os.getenv("DOC_CACHE_MAX_ENTRIES", "512")),
+    ttl=float(os.getenv("DOC_CACHE_TTL", "3600")),
+)
+
+# JD profiles (noun-lemma weights + embedding), built once per JD text and reused
+JD_ANALYZER = "noun_lemmas"
+jd_store = JDProfileStore(
+    directory=os.getenv("JD_PROFILE_DIR", os.path.join(os.path.dirname(__file__), ".cache", "jd_profiles")),
+    max_entries=int(os.getenv("JD_PROFILE_MAX_ENTRIES", "1024")),
+    max_files=int(os.getenv("JD_PROFILE_MAX_FILES", "10000")),
+    embed_model=EMBED_MODEL,
+)
+
+# Inverted index for JD -> top-K candidate search, built offline with
+# `python -m shared.candidate_index build <resume_dir> <index_dir>`
+CANDIDATE_INDEX_DIR = os.getenv("CANDIDATE_INDEX_DIR", os.path.join(os.path.dirname(__file__), ".cache", "candidates"))
+candidate_index_model = LazyModel("candidate_index", lambda: CandidateIndex(CANDIDATE_INDEX_DIR))
+
+# ANN (IVF) index over resume embeddings for semantic search; see /search
+vector_index_model = LazyModel("vector_index", lambda: VectorIndex(
+    os.getenv("VECTOR_INDEX_DIR", os.path.join(os.path.dirname(__file__), ".cache", "vectors")),
+    embedder_model.get().get_sentence_embedding_dimension(),
+    nprobe=int(os.getenv("VECTOR_NPROBE", "16")),
+    precision=os.getenv("VECTOR_PRECISION", "float16"),
+))
+
+def upload_digest(upload: UploadFile) -> str:
+    """
+    Stream the (in-memory or spooled) upload once to hash it and enforce
+    MAX_UPLOAD_BYTES without holding a second copy of the file. The key
+    includes the parser the filename selects: the same bytes uploaded as
+    .txt and as .pdf extract differently.
+    """
+    h, size, fp = hashlib.sha256(), 0, upload.file
+    fp.seek(0)
+    for chunk in iter(lambda: fp.read(1 << 16), b""):
+        size += len(chunk)
+        if size > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413,
+                                detail=f"{upload.filename} exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit")
+        h.update(chunk)
+    fp.seek(0)
+    return f"{document_kind(upload.filename)}:{h.hexdigest()}"
+
+class Admission:
+    """
+    Bounded in-flight counter; only touched from the event loop, so no lock.
+    """
+
+    def __init__(self, limit: int):
+        self.limit, self.active = limit, 0
+
+    def __enter__(self):
+        if self.active >= self.limit:
+            raise HTTPException(status_code=503, detail="Analyzer is busy, retry shortly.",
+                                headers={"Retry-After": RETRY_AFTER_S})
+        self.active += 1
 
+    def __exit__(self, *exc):
+        self.active -= 1
+
+admission = Admission(ANALYZE_WORKERS + ANALYZE_QUEUE_DEPTH)
+
+async def run_cpu(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(cpu_pool, fn, *args)
+
+async def run_encode(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(encode_pool, fn, *args)
+
+# pids of worker processes that reported spaCy loaded
+warm_workers: Set[int] = set()
+
+async def parse_uploads(uploads: List[UploadFile]) -> Tuple[List[str], List[Counter], int]:
+    """
+    Extract text and noun keywords for each upload, reusing cached parses of
+    identical bytes and spreading misses across the worker processes.
+    Returns (texts, keyword counters, cache hits).
+    """
+    texts, kws, todo = [None] * len(uploads), [None] * len(uploads), []
+    for i, upload in enumerate(uploads):
+        key = upload_digest(upload)
+        cached = doc_cache.get(key)
+        if cached is not None:
+            texts[i], kws[i] = cached
+        else:
+            todo.append((i, key, upload.file.read(), upload.filename))
+    chunks = [todo[w::ANALYZE_WORKERS] for w in range(min(ANALYZE_WORKERS, len(todo)))]
+    parsed = await asyncio.gather(*(run_cpu(parse_documents, [(d, n) for _, _, d, n in c]) for c in chunks))
+    for chunk, results in zip(chunks, parsed):
+        for (i, key, _, _), (text, kw) in zip(chunk, results):
+            texts[i], kws[i] = text, kw
+            doc_cache.put(key, text, kw)
+    return texts, kws, len(uploads) - len(todo)
+
+async def jd_profiles(jds: List[str]) -> List[JDProfile]:
+    """
+    Profiles for each JD text; only JDs not seen before are parsed and embedded.
+    """
+    profiles = [jd_store.get(profile_id(t, JD_ANALYZER)) for t in jds]
+    todo = [i for i, p in enumerate(profiles) if p is None]
+    if todo:
+        texts = [jds[i] for i in todo]
+        kws, vecs = await asyncio.gather(run_cpu(noun_keywords_many, texts), run_encode(embed, texts))
+        for i, text, kw, vec in zip(todo, texts, kws, vecs):
+            profiles[i] = JDProfile.build(text, JD_ANALYZER, freq=kw, embedding=vec, embed_model=EMBED_MODEL)
+            jd_store.put(profiles[i])
+    return profiles
+
+def stored_profiles(jd_ids: List[str]) -> List[JDProfile]:
+    malformed = [pid for pid in jd_ids if not valid_profile_id(pid)]
+    if malformed:
+        raise HTTPException(status_code=422, detail=f"Malformed JD profile id(s): {', '.join(map(repr, malformed))}")
+    profiles = [jd_store.get(pid) for pid in jd_ids]
+    unknown = [pid for pid, p in zip(jd_ids, profiles) if p is None]
+    if unknown:
+        # also ids built under an older taxonomy or encoder: post the JDs to /jd_profiles again
+        raise HTTPException(status_code=404, detail=f"Unknown or stale JD profile id(s): {', '.join(unknown)}")
+    return profiles
+
+def profile_matrix(profiles: List[JDProfile]) -> np.ndarray:
+    return np.stack([p.embedding for p in profiles]) if profiles else np.zeros((0, 1), dtype=np.float32)
+
+def keyword_overlap(kw_res: Counter, kw_jd: Counter) -> float:
     overlap = sum((kw_res & kw_jd).values()) / max(1, sum(kw_jd.values()))
-    keyword_score = round(min(100.0, overlap * 100.0), 1)
-    sem = round(semantic_score(res_text, jds), 1)
-    readability_score = round(map_readability(flesch_reading_ease(res_text or "a")), 1)
+    return round(min(100.0, overlap * 100.0), 1)
+
+def fit_score(keyword: float, semantic: float, readability: float, ats: float) -> float:
+    return round(0.45*keyword + 0.35*semantic + 0.10*readability + 0.10*ats, 1)
+
+def embed(texts: List[str]) -> np.ndarray:
+    # Unit-length rows, so cosine similarity is a plain matrix product
+    embedder = embedder_model.get()
+    return embed_cache_model.get().encode(
+        texts, lambda miss: embedder.encode(miss, convert_to_numpy=True, normalize_embeddings=True)
+    )
+
+@app.post("/jd_profiles")
+async def create_jd_profiles(jds: List[str] = Form(...)):
+    """
+    Precompute JD profiles; pass the returned ids as jd_ids to /analyze.
+    """
+    with admission:
+        profiles = await jd_profiles(jds)
+    return {"profiles": [{"id": p.id, "terms": len(p.terms), "skills": p.skills} for p in profiles]}
+
+@app.post("/candidates")
+async def candidates(jd: str = Form(...), k: int = Form(20)):
+    """
+    Top-k indexed resumes for a JD, ranked like the frontend keyword match.
+    """
+    if not candidate_index_model.loaded and not os.path.exists(os.path.join(CANDIDATE_INDEX_DIR, "meta.json")):
+        raise HTTPException(status_code=503, detail="No candidate index; build one with shared.candidate_index.")
+    index = candidate_index_model.get()
+    started = time.perf_counter()
+    top = await asyncio.get_running_loop().run_in_executor(None, index.search, jd, max(1, min(k, 1000)))
+    return {
+        "indexed": len(index),
+        "candidates": [{"id": doc_id, "score": score} for doc_id, score in top],
+        "search_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+def index_vectors(ids: List[str], texts: List[str]) -> int:
+    index = vector_index_model.get()
+    index.add(ids, embed(texts))
+    index.save()
+    return len(index)
+
+def remove_vectors(ids: List[str]) -> int:
+    index = vector_index_model.get()
+    removed = index.remove(ids)
+    index.save()
+    return removed
+
+def search_vectors(jd: str, k: int, nprobe: Optional[int]):
+    return vector_index_model.get().search(embed([jd]), k, nprobe=nprobe)[0]
+
+@app.post("/resume_vectors")
+async def add_resume_vectors(resumes: List[UploadFile] = File(...), ids: Optional[List[str]] = Form(None)):
+    """
+    Embed resumes into the semantic search index; ids default to the file names.
+    Re-adding an id replaces its vector.
+    """
+    ids = ids or [r.filename for r in resumes]
+    if len(ids) != len(resumes):
+        raise HTTPException(status_code=422, detail="Send one id per resume.")
+    with admission:
+        texts, _, _ = await parse_uploads(resumes)
+        size = await run_encode(index_vectors, ids, texts)
+    return {"indexed": ids, "size": size}
+
+@app.delete("/resume_vectors/{resume_id}")
+async def delete_resume_vector(resume_id: str):
+    if not await run_encode(remove_vectors, [resume_id]):
+        raise HTTPException(status_code=404, detail=f"Unknown resume id: {resume_id}")
+    return {"deleted": resume_id}
 
-    flags = ats_checks(res_text)
+@app.post("/search")
+async def search(jd: str = Form(...), k: int = Form(10), nprobe: Optional[int] = Form(None)):
+    """
+    Top-k indexed resumes by embedding similarity to the JD. nprobe above the
+    index's list count scans every list.
+    """
+    if nprobe is not None and nprobe < 1:
+        raise HTTPException(status_code=422, detail="nprobe must be at least 1.")
+    started = time.perf_counter()
+    with admission:
+        top = await run_encode(search_vectors, jd, max(1, min(k, 1000)), nprobe)
+    return {
+        "results": [{"id": doc_id, "semantic_score": round(sim * 100, 1)} for doc_id, sim in top],
+        "search_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+@app.post("/analyze")
+async def analyze(response: Response, resume: UploadFile = File(...),
+                  jds: Optional[List[str]] = Form(None), jd_ids: Optional[List[str]] = Form(None)):
+    if not jds and not jd_ids:
+        raise HTTPException(status_code=422, detail="Provide jds and/or jd_ids.")
+    stored = stored_profiles(jd_ids or [])
+    with admission:
+        # JD profiles (parsed only on first sight) overlap with the resume parse
+        profiles, ((res_text,), (kw_res,), hits) = await asyncio.gather(
+            jd_profiles(jds or []), parse_uploads([resume])
+        )
+        profiles += stored
+        response.headers["X-Doc-Cache"] = "HIT" if hits else "MISS"
+        res_vec, (readability_score, flags, skills) = await asyncio.gather(
+            run_encode(embed, [res_text]), run_cpu(text_quality, res_text)
+        )
+
+    kw_jd = sum((p.freq for p in profiles), Counter())
+    keyword_score = keyword_overlap(kw_res, kw_jd)
+    jd_sems = [round(float(x) * 100, 1) for x in profile_matrix(profiles) @ res_vec[0]]
+    sem = max(jd_sems, default=0.0)
     ats_score = max(0.0, 100.0 - 10.0 * len(flags))
 
     jd_top = [w for w, c in kw_jd.most_common(20)]
     res_vocab = set(kw_res.keys())
     keyword_gaps = [w for w in jd_top if w not in res_vocab][:10]
 
-    fit = round(0.45*keyword_score + 0.35*sem + 0.10*readability_score + 0.10*ats_score, 1)
+    fit = fit_score(keyword_score, sem, readability_score, ats_score)
     suggestions = []
     if keyword_gaps:
         suggestions.append(f"Add context for: {', '.join(keyword_gaps[:5])}.")
@@ -113,11 +303,130 @@ async def analyze(resume: UploadFile = File(...), jds: List[str] = Form(...)):
         "fit_score": fit,
         "keyword_score": keyword_score,
         "semantic_score": sem,
+        "jd_semantic_scores": jd_sems,
         "readability_score": readability_score,
         "ats_score": ats_score,
-        "matched_skills": extract_skills(res_text)["matched"],
-        "missing_skills": extract_skills(res_text)["missing"],
+        "matched_skills": skills["matched"],
+        "missing_skills": skills["missing"],
+        "skill_counts": skills["counts"],
         "keyword_gaps": keyword_gaps,
         "rewrite_suggestions": suggestions,
         "ats_flags": flags
     }
+
+@app.post("/analyze_batch")
+async def analyze_batch(response: Response, resumes: List[UploadFile] = File(...), jds: List[str] = Form(...)):
+    """
+    Score N resumes against M job descriptions in one request.
+    Every document is extracted, parsed and embedded exactly once.
+    """
+    started = time.perf_counter()
+    with admission:
+        profiles, (res_texts, kw_res, hits) = await asyncio.gather(
+            jd_profiles(jds), parse_uploads(resumes)
+        )
+        response.headers["X-Doc-Cache-Hits"] = f"{hits}/{len(resumes)}"
+        n = len(res_texts)
+        res_vecs, *quality = await asyncio.gather(
+            run_encode(embed, res_texts), *(run_cpu(text_quality, t) for t in res_texts)
+        )
+    sims = res_vecs @ profile_matrix(profiles).T  # shape [n_resumes, n_jds]
+
+    results, fit_matrix = [], []
+    for i, (upload, text) in enumerate(zip(resumes, res_texts)):
+        readability_score, flags, _ = quality[i]
+        ats_score = max(0.0, 100.0 - 10.0 * len(flags))
+        row = []
+        for j in range(len(jds)):
+            keyword_score = keyword_overlap(kw_res[i], profiles[j].freq)
+            sem = round(float(sims[i, j]) * 100, 1)
+            fit = fit_score(keyword_score, sem, readability_score, ats_score)
+            row.append(fit)
+            results.append({
+                "resume": upload.filename,
+                "resume_index": i,
+                "jd_index": j,
+                "fit_score": fit,
+                "keyword_score": keyword_score,
+                "semantic_score": sem,
+                "readability_score": readability_score,
+                "ats_score": ats_score,
+            })
+        fit_matrix.append(row)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "resumes": [r.filename for r in resumes],
+        "jd_count": len(jds),
+        "fit_matrix": fit_matrix,
+        "results": results,
+        "throughput": {
+            "elapsed_s": round(elapsed, 3),
+            "pairs": n * len(jds),
+            "pairs_per_s": round(n * len(jds) / max(elapsed, 1e-9), 1),
+            "resumes_per_s": round(n / max(elapsed, 1e-9), 2),
+        },
+    }
+
+@app.get("/stats")
+def stats():
+    return {
+        "embedding_cache": embed_cache_model.get().stats() if embed_cache_model.loaded else {},
+        "document_cache": doc_cache.stats(),
+        "vector_index": vector_index_model.get().stats() if vector_index_model.loaded else {},
+        "analyze": {"in_flight": admission.active, "limit": admission.limit, "workers": ANALYZE_WORKERS},
+    }
+
+async def warm_up_models():
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(encode_pool, embed_cache_model.get)
+    # The pool starts processes only while none is idle, so tasks on a warm worker
+    # prove nothing: keep every worker busy until all ANALYZE_WORKERS have reported
+    # from the initializer. Each round starts at least one missing process.
+    while True:
+        while not warmup_reports.empty():
+            pid, error = warmup_reports.get()
+            if error:
+                raise RuntimeError(f"spaCy failed to load in worker {pid}: {error}")
+            warm_workers.add(pid)
+        if len(warm_workers) >= ANALYZE_WORKERS:
+            return
+        await asyncio.gather(*(loop.run_in_executor(cpu_pool, hold, 0.05) for _ in range(ANALYZE_WORKERS)))
+
+def warmup_failed(task: asyncio.Task) -> bool:
+    # exception() raises CancelledError on a cancelled task, so check that first
+    return task.done() and (task.cancelled() or task.exception() is not None)
+
+def schedule_warmup():
+    task = getattr(app.state, "warmup", None)
+    if task is None or warmup_failed(task):
+        app.state.warmup = asyncio.ensure_future(warm_up_models())
+
+@app.on_event("startup")
+async def startup_warmup():
+    if WARMUP_MODELS:
+        schedule_warmup()
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness probe: 200 once the encoder and the spaCy workers are loaded.
+    The first probe starts the warm-up if it wasn't run at startup.
+    """
+    schedule_warmup()
+    is_ready = embedder_model.loaded and app.state.warmup.done() and not warmup_failed(app.state.warmup)
+    body = {
+        "ready": is_ready,
+        "warmup_at_startup": WARMUP_MODELS,
+        "models": {
+            "embedder": embedder_model.status(),
+            "spacy_workers_loaded": len(warm_workers),
+            "spacy_workers_total": ANALYZE_WORKERS,
+        },
+    }
+    return JSONResponse(body, status_code=200 if is_ready else 503)
+
+@app.on_event("shutdown")
+def shutdown_pools():
+    cpu_pool.shutdown(wait=False, cancel_futures=True)
+    encode_pool.shutdown(wait=False, cancel_futures=True)
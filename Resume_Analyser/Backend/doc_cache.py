@@ -0,0 +1,53 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Tuple
+
+ParsedDoc = Tuple[str, Counter]
+
+
+class DocumentCache:
+    """
+    LRU cache of parsed uploads keyed by document kind + sha256 of the raw
+    bytes (app.upload_digest).
+    Stores (extracted text, noun-lemma Counter); entries expire after
+    ttl seconds and the oldest are evicted beyond max_entries.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600.0):
+        self.max_entries = max(0, max_entries)
+        self.ttl = ttl
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Tuple[float, ParsedDoc]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[ParsedDoc]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] < time.monotonic():
+                del self._items[key]
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: str, text: str, keywords: Counter):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, (text, keywords))
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self._items),
+        }
@@ -0,0 +1,53 @@
+"""
+Process-wide, lazily loaded models. Nothing heavy is imported until the
+first .get(), so importing the API (reloads, test collection, cold starts)
+stays cheap and each process only loads the models it actually uses.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+SPACY_MODEL = "en_core_web_sm"
+# Keyword extraction only needs POS tags and lemmas (tok2vec, tagger,
+# attribute_ruler, lemmatizer); skip the dependency parser and NER.
+# Set SPACY_EXCLUDE="" to load the full pipeline.
+SPACY_EXCLUDE = [c.strip() for c in os.getenv("SPACY_EXCLUDE", "parser,ner").split(",") if c.strip()]
+EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class LazyModel:
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._value: Optional[Any] = None
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not None
+
+    def get(self) -> Any:
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    started = time.perf_counter()
+                    self._value = self._loader()
+                    self.load_seconds = round(time.perf_counter() - started, 3)
+        return self._value
+
+    def status(self) -> Dict[str, Any]:
+        return {"loaded": self.loaded, "load_seconds": self.load_seconds}
+
+
+def _load_spacy():
+    import spacy
+    return spacy.load(SPACY_MODEL, exclude=SPACY_EXCLUDE)
+
+def _load_embedder():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBED_MODEL)
+
+spacy_model = LazyModel(SPACY_MODEL, _load_spacy)
+embedder_model = LazyModel(EMBED_MODEL, _load_embedder)
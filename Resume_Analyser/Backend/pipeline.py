@@ -0,0 +1,130 @@
+"""
+CPU-bound parsing helpers. Kept free of FastAPI and torch so the analysis
+worker processes only import what they actually run.
+"""
+import io, os, re, sys, time
+from collections import Counter
+from typing import BinaryIO, Dict, List, Tuple
+import docx2txt
+from textstat import flesch_reading_ease
+from models import spacy_model
+
+# shared/ lives next to Backend/ and Frontend/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared import taxonomy
+from shared.pdf_extract import MAX_PDF_PAGES, extract_pdf
+
+# nlp.pipe tuning; texts longer than SPACY_MAX_CHARS are parsed in chunks
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "32"))
+SPACY_N_PROCESS = int(os.getenv("SPACY_N_PROCESS", "1"))
+SPACY_MAX_CHARS = int(os.getenv("SPACY_MAX_CHARS", "20000"))
+
+def document_kind(filename: str) -> str:
+    # Which parser extract_text uses for a file: "pdf", "docx" or "text"
+    name = (filename or "").lower()
+    if name.endswith(".pdf"):
+        return "pdf"
+    if name.endswith(".docx"):
+        return "docx"
+    return "text"
+
+def extract_text(fp: BinaryIO, filename: str) -> str:
+    # Parsers read straight from the stream; nothing is written to disk
+    kind = document_kind(filename)
+    fp.seek(0)
+    if kind == "pdf":
+        return pdf_extract_text(fp)
+    elif kind == "docx":
+        try:
+            return docx2txt.process(fp) or ""
+        except Exception:
+            return ""
+    else:
+        return fp.read().decode(errors="ignore")
+
+def pdf_extract_text(fp: BinaryIO) -> str:
+    # Same extraction and normalization as the frontend (shared.pdf_extract).
+    # Documents are already spread over the analysis workers, so pages are
+    # extracted in this process (per-page timeout/memory guards still apply).
+    return extract_pdf(fp.read(), MAX_PDF_PAGES, workers=1)
+
+def _doc_keywords(doc) -> Counter:
+    toks = [t.lemma_ for t in doc if t.pos_ in {"NOUN", "PROPN"} and t.is_alpha and not t.is_stop]
+    return Counter(toks)
+
+def _chunks(text: str, size: int) -> List[str]:
+    # Split on whitespace near the limit so words are never cut in half
+    out = []
+    while len(text) > size:
+        cut = text.rfind(" ", 0, size)
+        cut = cut if cut > 0 else size
+        out.append(text[:cut])
+        text = text[cut:]
+    out.append(text)
+    return out
+
+def noun_keywords_many(texts: List[str]) -> List[Counter]:
+    """
+    Noun/proper-noun lemma counts per text, parsed in one nlp.pipe pass.
+    Long texts are chunked and their counts summed back per text.
+    """
+    owners, pieces = [], []
+    for i, text in enumerate(texts):
+        for piece in _chunks(text.lower(), SPACY_MAX_CHARS):
+            owners.append(i)
+            pieces.append(piece)
+    out = [Counter() for _ in texts]
+    docs = spacy_model.get().pipe(pieces, batch_size=SPACY_BATCH_SIZE, n_process=SPACY_N_PROCESS)
+    for i, doc in zip(owners, docs):
+        out[i].update(_doc_keywords(doc))
+    return out
+
+def warmup(report=None) -> int:
+    """
+    Worker initializer: load spaCy in this process before it takes any work
+    and put (pid, error or None) on the report queue. Returns the pid.
+    """
+    error = None
+    try:
+        spacy_model.get()
+    except Exception as e:
+        # an initializer that raises breaks the whole pool; the worker's tasks raise instead
+        error = f"{type(e).__name__}: {e}"
+    if report is not None:
+        report.put((os.getpid(), error))
+    return os.getpid()
+
+def hold(seconds: float) -> int:
+    # Occupies a worker briefly so the pool starts its missing processes
+    time.sleep(seconds)
+    return os.getpid()
+
+def parse_documents(docs: List[Tuple[bytes, str]]) -> List[Tuple[str, Counter]]:
+    """
+    Worker entry point: extract text and noun keywords for (bytes, filename) pairs.
+    """
+    texts = [extract_text(io.BytesIO(data), name) for data, name in docs]
+    return list(zip(texts, noun_keywords_many(texts)))
+
+def map_readability(re: float) -> float:
+    return max(0.0, min(100.0, re))
+
+def extract_skills(text: str) -> Dict[str, object]:
+    # matched / missing skill ids plus occurrence counts, in one scan;
+    # the taxonomy index hot-reloads when shared/taxonomy.json changes
+    return taxonomy.current().matcher.extract(text)
+
+def ats_checks(text: str):
+    flags, low = [], text.lower()
+    if "skills" not in low: flags.append("Add a dedicated 'Skills' section.")
+    if not re.search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text): flags.append("Add a professional email.")
+    if not re.search(r"\b20\d{2}\b", text): flags.append("Add years for roles (YYYY).")
+    if "experience" not in low and "work" not in low: flags.append("Add 'Experience' section header.")
+    return flags
+
+def text_quality(text: str) -> Tuple[float, List[str], Dict[str, object]]:
+    """
+    Resume-only checks: (readability score, ATS flags, skill match).
+    """
+    readability = round(map_readability(flesch_reading_ease(text or "a")), 1)
+    return readability, ats_checks(text), extract_skills(text)
@@ -1,11 +1,17 @@
 # Frontend/app.py
+import os
+import sys
 import streamlit as st
+
+# shared/ (taxonomy, keyword engine) lives next to Frontend/ and Backend/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.ui import apply_theme_css, t
 
 from views.home import view as view_home
 from views.analysis import view_analysis as view_analyze
 from views.history import view as view_history
 from views.settings import view as view_settings
+from services.embeddings import DEFAULT_PROVIDER
 
 # ---- ONE page_config only ----
 st.set_page_config(page_title="Resume Analyzer", page_icon="🧠", layout="wide")
@@ -19,6 +25,7 @@ defaults = {
     "density": "Comfortable",
     "animations": True,
     "persist_history": False,
+    "embed_provider": DEFAULT_PROVIDER,
 }
 for k, v in defaults.items():
     st.session_state.setdefault(k, v)
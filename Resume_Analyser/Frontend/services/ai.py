@@ -1,25 +1,88 @@
 # Frontend/services/ai.py
+import asyncio
+import json
 import os
+import threading
+import time
+from functools import lru_cache
+import httpx
 import numpy as np
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+from shared.quantize import Quantized, merge_top_k
+from services.embeddings import get_provider
+from services.llm_cache import LLMCache, prompt_version
+from services.prompt_budget import PROMPT_TOKEN_BUDGET, BudgetReport, compress, fit_pair
 
-_EMBED_MODEL = "text-embedding-3-small"
 _CHAT_MODEL  = "gpt-4o-mini"
+# Resume phrases embedded and scored per block in semantic_top_k
+_MATCH_BLOCK = int(os.getenv("SEMANTIC_MATCH_BLOCK", "4096"))
+_LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "llm"))
 
-def _client():
+# ---- Clients (one pooled client per process, shared by all sessions) ----
+# OPENAI_BASE_URL points the clients elsewhere, e.g. services.mock_openai_server
+_TIMEOUT = httpx.Timeout(float(os.getenv("LLM_TIMEOUT_S", "60")), connect=10.0)
+_LIMITS = httpx.Limits(max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")), max_keepalive_connections=10)
+
+def _api_key() -> str:
     key = os.getenv("OPENAI_API_KEY")
     if not key:
         raise RuntimeError("OPENAI_API_KEY not set")
-    return OpenAI(api_key=key)
+    return key
 
-# ---- LLM skill extraction ----
-def extract_skill_bag(text: str, max_items: int = 60) -> list[str]:
+@lru_cache(maxsize=4)
+def _sync_client(key: str, base_url: str | None) -> OpenAI:
+    return OpenAI(api_key=key, base_url=base_url, timeout=_TIMEOUT,
+                  http_client=httpx.Client(limits=_LIMITS, timeout=_TIMEOUT))
+
+def _client() -> OpenAI:
+    return _sync_client(_api_key(), os.getenv("OPENAI_BASE_URL"))
+
+# Async calls run on one long-lived event loop in a daemon thread, so the
+# pooled AsyncOpenAI connections stay bound to a single loop even though
+# Streamlit executes every rerun on a fresh script thread.
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="ai-event-loop", daemon=True).start()
+    return _loop
+
+def run_async(coro):
     """
-    Ask the LLM to extract a clean, de-duplicated list of skills/keywords/tools/frameworks.
-    Returns lowercase strings.
+    Run a coroutine on the shared AI event loop and wait for its result.
     """
-    cli = _client()
-    prompt = f"""Extract a concise, de-duplicated list of SKILLS/TOOLS/KEYWORDS from the text.
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop()).result()
+
+@lru_cache(maxsize=4)
+def _async_client_for(key: str, base_url: str | None) -> AsyncOpenAI:
+    return AsyncOpenAI(api_key=key, base_url=base_url, timeout=_TIMEOUT,
+                       http_client=httpx.AsyncClient(limits=_LIMITS, timeout=_TIMEOUT))
+
+def _async_client() -> AsyncOpenAI:
+    # only call from coroutines running on _event_loop()
+    return _async_client_for(_api_key(), os.getenv("OPENAI_BASE_URL"))
+
+# ---- LLM response cache ----
+_llm_cache: LLMCache | None = None
+_llm_cache_lock = threading.Lock()
+
+def llm_cache() -> LLMCache:
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache(os.path.join(_LLM_CACHE_DIR, "responses.sqlite"),
+                                  max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000")),
+                                  ttl_s=float(os.getenv("LLM_CACHE_TTL_S", str(30 * 86400))))
+            # answers to an older prompt template are never served; drop them
+            _llm_cache.invalidate("skills", keep_version=SKILL_PROMPT_VERSION)
+    return _llm_cache
+
+# ---- LLM skill extraction ----
+_SKILL_TEMPLATE = """Extract a concise, de-duplicated list of SKILLS/TOOLS/KEYWORDS from the text.
 - Prefer nouns/bigrams ("data visualization", "feature engineering", "Power BI")
 - Include programming languages, libraries, cloud, DBs, ML topics, domain terms
 - Return ONLY a JSON array of strings (max {max_items} items). No commentary.
@@ -27,68 +90,141 @@ def extract_skill_bag(text: str, max_items: int = 60) -> list[str]:
 TEXT:
 {text}
 """
-    resp = cli.chat.completions.create(
-        model=_CHAT_MODEL,
-        temperature=0.2,
-        messages=[{"role":"user","content":prompt}]
-    )
-    import json
-    content = resp.choices[0].message.content
+SKILL_PROMPT_VERSION = prompt_version(_SKILL_TEMPLATE)
+
+def _parse_skill_bag(content: str, max_items: int) -> list[str] | None:
     try:
         items = json.loads(content)
         items = [str(x).strip().lower() for x in items if str(x).strip()]
         # normalize tiny punctuation variants
-        items = list(dict.fromkeys(items))[:max_items]
-        return items
+        return list(dict.fromkeys(items))[:max_items]
     except Exception:
-        # fallback: naive token split if JSON parsing fails
-        return list(set([w.strip(" ,.;:").lower() for w in text.split() if len(w)>2]))[:max_items]
+        return None
 
-# ---- Embeddings & similarity ----
-def embed_texts(texts: list[str]) -> np.ndarray:
-    if not texts:
-        return np.zeros((0, 1536))
-    cli = _client()
-    out = cli.embeddings.create(model=_EMBED_MODEL, input=texts)
-    vecs = np.array([d.embedding for d in out.data], dtype=np.float32)
-    # normalize for cosine
-    norms = np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-9
-    return vecs / norms
-
-def semantic_match(jd_skills: list[str], resume_chunks: list[str], threshold: float = 0.78):
+def _naive_skill_bag(text: str, max_items: int) -> list[str]:
+    # fallback: naive token split if JSON parsing fails
+    return list(set([w.strip(" ,.;:").lower() for w in text.split() if len(w)>2]))[:max_items]
+
+async def _skill_bag_uncoalesced(key: str, text: str, max_items: int) -> list[str]:
+    cache = llm_cache()
+    cached = await asyncio.to_thread(cache.get, key)
+    if cached is not None:
+        return cached
+    resp = await _async_client().chat.completions.create(
+        model=_CHAT_MODEL,
+        temperature=0.2,
+        messages=[{"role":"user","content":_SKILL_TEMPLATE.format(max_items=max_items, text=text)}]
+    )
+    items = _parse_skill_bag(resp.choices[0].message.content, max_items)
+    if items is None:
+        return _naive_skill_bag(text, max_items)  # not cached: retry the LLM next time
+    await asyncio.to_thread(cache.put, key, "skills", _CHAT_MODEL, SKILL_PROMPT_VERSION, items)
+    return items
+
+def _budgeted(text: str, jd_text: str | None, reports: list | None) -> str:
+    # long texts keep their most JD-relevant sections (services.prompt_budget)
+    text, report = compress(text, PROMPT_TOKEN_BUDGET, _CHAT_MODEL, jd_text, label="skills")
+    if reports is not None:
+        reports.append(report)
+    return text
+
+# key -> task for extractions in flight; only touched on the shared event loop
+_inflight: dict[str, asyncio.Task] = {}
+
+async def extract_skill_bag_async(text: str, max_items: int = 60, jd_text: str | None = None,
+                                  reports: list | None = None) -> list[str]:
     """
-    For each JD skill, find the best matching resume phrase by cosine similarity.
-    Returns dicts: matched, missing, scores
+    Cached (LLMCache) and coalesced: concurrent calls for the same text,
+    from any session, share one completion. Text over the prompt token
+    budget is compressed first (ranked against jd_text when given); its
+    BudgetReport is appended to reports.
     """
-    if not jd_skills:
-        return [], jd_skills, {}
+    text = _budgeted(text, jd_text, reports)
+    key = LLMCache.key("skills", _CHAT_MODEL, SKILL_PROMPT_VERSION, text, max_items=max_items)
+    task = _inflight.get(key)
+    if task is None:
+        task = _inflight[key] = asyncio.ensure_future(_skill_bag_uncoalesced(key, text, max_items))
+        task.add_done_callback(lambda _t: _inflight.pop(key, None))
+    else:
+        llm_cache().note_coalesced()
+    return list(await asyncio.shield(task))
 
-    # Chunk resume (skills list or sentences)
-    chunks = resume_chunks if resume_chunks else []
-    if not chunks:
-        return [], jd_skills, {}
+def extract_skill_bag(text: str, max_items: int = 60, jd_text: str | None = None,
+                      reports: list | None = None) -> list[str]:
+    """
+    Ask the LLM to extract a clean, de-duplicated list of skills/keywords/tools/frameworks.
+    Returns lowercase strings.
+    """
+    return run_async(extract_skill_bag_async(text, max_items, jd_text, reports))
+
+def extract_skill_bags(texts: list[str], max_items: int = 60, jd_text: str | None = None,
+                       reports: list | None = None) -> list[list[str]]:
+    """
+    extract_skill_bag for several texts with the completions in flight
+    concurrently; results (and budget reports) come back in input order.
+    """
+    per_text: list[list[BudgetReport]] = [[] for _ in texts]
+    async def _all():
+        return await asyncio.gather(*(extract_skill_bag_async(t, max_items, jd_text, r)
+                                      for t, r in zip(texts, per_text)))
+    bags = list(run_async(_all()))
+    if reports is not None:
+        reports.extend(r for rs in per_text for r in rs)
+    return bags
+
+# ---- Embeddings & similarity ----
+def embed_texts(texts: list[str], provider: str | None = None) -> np.ndarray:
+    # Unit-length rows from the selected provider (see services.embeddings), disk-cached
+    return get_provider(provider).embed(texts)
 
-    # Embedding matrices
-    e_jd = embed_texts(jd_skills)
-    e_rs = embed_texts(chunks)
+def embedding_stats(provider: str | None = None) -> dict:
+    # Cache hit/miss counters of the provider (empty before its first call)
+    return get_provider(provider).stats()
 
-    # cosine = dot(e_jd, e_rs.T) because both are normalized
-    sims = e_jd @ e_rs.T  # shape [len(jd), len(resume)]
+def semantic_top_k(jd_skills: list[str], resume_chunks: list[str], k: int = 3,
+                   provider: str | None = None) -> dict[str, list[tuple[str, float]]]:
+    """
+    For each JD skill, the k resume phrases with the highest cosine similarity,
+    best first. Phrases are embedded and scored one block at a time against a
+    running top-k, so neither all phrase vectors nor the full skills x phrases
+    similarity matrix is held at once.
+    """
+    if not jd_skills or not resume_chunks:
+        return {sk: [] for sk in jd_skills}
+    e_jd = embed_texts(jd_skills, provider)
+    scores = np.empty((len(jd_skills), 0), dtype=np.float32)
+    idx = np.empty((len(jd_skills), 0), dtype=np.int64)
+    for start in range(0, len(resume_chunks), _MATCH_BLOCK):
+        block = Quantized(embed_texts(resume_chunks[start:start + _MATCH_BLOCK], provider))
+        # cosine = dot product, both sides are unit length
+        b_scores, b_idx = block.top_k(e_jd, k)
+        scores, idx = merge_top_k(scores, idx, b_scores, b_idx + start, k)
+    return {sk: [(resume_chunks[j], float(v)) for j, v in zip(idx[r], scores[r])]
+            for r, sk in enumerate(jd_skills)}
+
+def apply_threshold(top: dict[str, list[tuple[str, float]]], threshold: float):
+    """
+    Split semantic_top_k results at threshold on each skill's best score.
+    Returns matched, missing, scores (skill -> best score).
+    """
     matched, missing, best_scores = [], [], {}
-    for i, sk in enumerate(jd_skills):
-        j = int(np.argmax(sims[i])) if e_rs.size else -1
-        score = float(sims[i, j]) if j >= 0 else 0.0
-        best_scores[sk] = score
-        if score >= threshold:
-            matched.append(sk)
-        else:
-            missing.append(sk)
+    for sk, hits in top.items():
+        best_scores[sk] = hits[0][1] if hits else 0.0
+        (matched if best_scores[sk] >= threshold else missing).append(sk)
     return matched, missing, best_scores
 
+def semantic_match(jd_skills: list[str], resume_chunks: list[str], threshold: float = 0.78,
+                   provider: str | None = None):
+    """
+    For each JD skill, find the best matching resume phrase by cosine similarity.
+    provider picks the embedding backend ("openai" | "local", default EMBED_PROVIDER).
+    Returns dicts: matched, missing, scores
+    """
+    return apply_threshold(semantic_top_k(jd_skills, resume_chunks, 1, provider), threshold)
+
 # ---- Suggestions (LLM) ----
-def generate_suggestions(resume_text: str, jd_text: str, missing_skills: list[str], matched_skills: list[str]) -> str:
-    cli = _client()
-    prompt = f"""You are a resume coach. Compare the resume with the job description.
+def _suggestion_prompt(resume_text: str, jd_text: str, missing_skills: list[str], matched_skills: list[str]) -> str:
+    return f"""You are a resume coach. Compare the resume with the job description.
 
 - Missing skills to prioritize: {missing_skills[:20]}
 - Already matched strengths: {matched_skills[:15]}
@@ -105,9 +241,61 @@ Resume:
 Job Description:
 {jd_text}
 """
-    resp = cli.chat.completions.create(
+
+class TokenStream:
+    """
+    Iterates the text deltas of a streamed chat completion and times it:
+    ttft_s (request sent -> first token), total_s, and the joined text.
+    budget holds the prompt's BudgetReports.
+    """
+
+    def __init__(self, chunks, started: float, budget: list[BudgetReport] | None = None):
+        self._chunks = chunks
+        self.started = started
+        self.budget = budget or []
+        self.ttft_s: float | None = None
+        self.total_s: float | None = None
+        self.text = ""
+
+    def __iter__(self):
+        parts = []
+        try:
+            for chunk in self._chunks:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if self.ttft_s is None:
+                    self.ttft_s = time.perf_counter() - self.started
+                parts.append(delta)
+                yield delta
+        finally:
+            self.text = "".join(parts)
+            self.total_s = time.perf_counter() - self.started
+
+def stream_suggestions(resume_text: str, jd_text: str, missing_skills: list[str],
+                       matched_skills: list[str]) -> TokenStream:
+    """
+    Same plan as generate_suggestions, yielded token by token as it is generated.
+    """
+    started = time.perf_counter()
+    resume_text, jd_text, reports = fit_pair(resume_text, jd_text, _CHAT_MODEL)
+    chunks = _client().chat.completions.create(
+        model=_CHAT_MODEL,
+        temperature=0.4,
+        messages=[{"role":"user","content":_suggestion_prompt(resume_text, jd_text, missing_skills, matched_skills)}],
+        stream=True,
+    )
+    return TokenStream(chunks, started, reports)
+
+def generate_suggestions(resume_text: str, jd_text: str, missing_skills: list[str], matched_skills: list[str],
+                         reports: list | None = None) -> str:
+    # resume + JD are fitted to the prompt token budget; reports receives the BudgetReports
+    resume_text, jd_text, budget = fit_pair(resume_text, jd_text, _CHAT_MODEL)
+    if reports is not None:
+        reports.extend(budget)
+    resp = _client().chat.completions.create(
         model=_CHAT_MODEL,
         temperature=0.4,
-        messages=[{"role":"user","content":prompt}]
+        messages=[{"role":"user","content":_suggestion_prompt(resume_text, jd_text, missing_skills, matched_skills)}]
     )
     return resp.choices[0].message.content
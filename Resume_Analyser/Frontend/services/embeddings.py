@@ -0,0 +1,212 @@
+# Frontend/services/embeddings.py
+"""
+Embedding providers behind services.ai.semantic_match.
+
+  "openai" - text-embedding-3-small over the API (1536-d)
+  "local"  - sentence-transformers MiniLM on CPU, the model the backend
+             loads (384-d); no network calls, no API key
+  "fake"   - the OpenAI path against services.fake_openai (offline tests)
+
+OpenAI requests are split into token-aware batches (tiktoken), sent
+concurrently (EMBED_CONCURRENCY at a time) with exponential backoff on
+429s / transient errors, and reassembled in input order.
+
+Every provider returns unit-length float32 rows and goes through one SQLite
+embedding cache (shared.embed_cache.SQLiteEmbeddingCache, keyed by model +
+text), so a string is embedded once per model and reused across sessions,
+processes and restarts; only uncached strings are sent, in one batch.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import openai
+from shared.embed_cache import SQLiteEmbeddingCache
+from services.tokens import count_tokens, truncate_tokens
+
+CACHE_DIR = os.getenv("AI_EMBED_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "embeddings"))
+CACHE_MAX_ENTRIES = int(os.getenv("AI_EMBED_CACHE_MAX_ENTRIES", "500000"))
+DEFAULT_PROVIDER = os.getenv("EMBED_PROVIDER", "openai")
+# Stored form of cached vectors: float32 | float16 | int8 (decoded to float32 on read)
+CACHE_PRECISION = os.getenv("EMBED_PRECISION", "float32")
+
+
+class EmbeddingProvider:
+    name = ""
+    label = ""
+    model = ""
+    listed = True  # offered in Settings
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache = None
+
+    @property
+    def dim(self) -> int:
+        raise NotImplementedError
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    @property
+    def cache(self) -> SQLiteEmbeddingCache:
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    self._cache = SQLiteEmbeddingCache(os.path.join(CACHE_DIR, "embeddings.sqlite"), self.model,
+                                                       self.dim, max_entries=CACHE_MAX_ENTRIES,
+                                                       precision=CACHE_PRECISION)
+        return self._cache
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return self.cache.encode(texts, self._encode)
+
+    def stats(self) -> dict:
+        # Empty until the provider has embedded something (avoids loading the model)
+        return self._cache.stats() if self._cache is not None else {}
+
+
+class OpenAIEmbeddings(EmbeddingProvider):
+    name = "openai"
+    label = "OpenAI (text-embedding-3-small)"
+    model = "text-embedding-3-small"
+
+    # API limits: tokens per input, inputs per request; the request token cap is ours
+    max_input_tokens = 8191
+    max_batch_items = 2048
+    max_batch_tokens = int(os.getenv("EMBED_MAX_BATCH_TOKENS", "100000"))
+    concurrency = max(1, int(os.getenv("EMBED_CONCURRENCY", "4")))
+    max_retries = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+    backoff_s, backoff_cap_s = 0.5, 30.0
+    _retryable = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+    def __init__(self):
+        super().__init__()
+        self.requests = self.retries = 0
+
+    @property
+    def dim(self) -> int:
+        return 1536
+
+    def _client(self):
+        from services.ai import _client
+        # backoff is handled here, per batch
+        return _client().with_options(max_retries=0)
+
+    def _batches(self, texts: list[str]) -> list[list[str]]:
+        """
+        Greedy in-order packing under the per-request item and token caps.
+        """
+        batches, batch, used = [], [], 0
+        for text in texts:
+            n = count_tokens(text, self.model)
+            if batch and (len(batch) >= self.max_batch_items or used + n > self.max_batch_tokens):
+                batches.append(batch)
+                batch, used = [], 0
+            batch.append(text)
+            used += n
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _create(self, client, batch: list[str]) -> np.ndarray:
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._lock:
+                    self.requests += 1
+                out = client.embeddings.create(model=self.model, input=batch)
+                return np.array([d.embedding for d in sorted(out.data, key=lambda d: d.index)], dtype=np.float32)
+            except self._retryable as e:
+                if attempt == self.max_retries:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                delay = min(self.backoff_cap_s, self.backoff_s * 2 ** attempt) * random.uniform(0.5, 1.0)
+                response = getattr(e, "response", None)
+                retry_after = response.headers.get("retry-after") if response is not None else None
+                try:
+                    delay = max(delay, float(retry_after)) if retry_after else delay
+                except ValueError:
+                    pass
+                time.sleep(delay)
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        texts = [truncate_tokens(t, self.max_input_tokens, self.model) for t in texts]
+        batches, client = self._batches(texts), self._client()
+        if len(batches) == 1:
+            vecs = self._create(client, batches[0])
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+                vecs = np.concatenate(list(pool.map(lambda b: self._create(client, b), batches)))
+        # normalize for cosine
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-9
+        return vecs / norms
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        if stats:
+            stats.update(requests=self.requests, retries=self.retries)
+        return stats
+
+
+class FakeOpenAIEmbeddings(OpenAIEmbeddings):
+    name = "fake"
+    label = "Fake OpenAI (offline test double)"
+    model = "fake-text-embedding-3-small"
+    listed = False
+    backoff_s = 0.01
+
+    def __init__(self, client=None):
+        super().__init__()
+        from services.fake_openai import FakeOpenAI
+        self.client = client or FakeOpenAI(rate_limit_p=float(os.getenv("FAKE_OPENAI_429_RATE", "0")))
+
+    def _client(self):
+        return self.client
+
+
+class LocalEmbeddings(EmbeddingProvider):
+    name = "local"
+    label = "Local MiniLM (offline, CPU)"
+    model = os.getenv("LOCAL_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    batch_size = int(os.getenv("LOCAL_EMBED_BATCH", "64"))
+
+    def __init__(self):
+        super().__init__()
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    def _load(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model, device="cpu")
+        return self._model
+
+    @property
+    def dim(self) -> int:
+        return self._load().get_sentence_embedding_dimension()
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        return self._load().encode(texts, batch_size=self.batch_size, convert_to_numpy=True,
+                                   normalize_embeddings=True).astype(np.float32)
+
+
+PROVIDERS = {p.name: p for p in (OpenAIEmbeddings, LocalEmbeddings, FakeOpenAIEmbeddings)}
+_instances: dict[str, EmbeddingProvider] = {}
+_instances_lock = threading.Lock()
+
+def get_provider(name: str | None = None) -> EmbeddingProvider:
+    name = name or DEFAULT_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown embedding provider {name!r}; choose from {sorted(PROVIDERS)}")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = PROVIDERS[name]()
+        return _instances[name]
@@ -0,0 +1,78 @@
+# Frontend/services/fake_openai.py
+"""
+Offline stand-in for the parts of the OpenAI client services.ai uses, so
+batching, retries and caching can be exercised without a key or network.
+
+Embeddings are deterministic per text (seeded from its sha256). The fake
+enforces the API's request limits and can inject 429s and latency:
+
+    FakeOpenAI(rate_limit_p=0.2, latency=0.05)
+"""
+import hashlib
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import openai
+
+from services.tokens import count_tokens
+
+
+def _error(cls, status: int, message: str, path: str, headers: dict | None = None):
+    request = httpx.Request("POST", f"http://fake-openai.local/v1/{path}")
+    return cls(message, response=httpx.Response(status, headers=headers or {}, request=request), body=None)
+
+
+class _Embeddings:
+    def __init__(self, owner: "FakeOpenAI"):
+        self._owner = owner
+
+    def create(self, model: str, input: list[str], **kwargs):
+        return self._owner._embed(model, input)
+
+
+class FakeOpenAI:
+    max_input_tokens = 8191
+    max_inputs = 2048
+    max_request_tokens = 300_000
+
+    def __init__(self, dim: int = 1536, rate_limit_p: float = 0.0, latency: float = 0.0,
+                 retry_after: float = 0.01, seed: int = 0):
+        self.dim = dim
+        self.rate_limit_p = rate_limit_p
+        self.latency = latency
+        self.retry_after = retry_after
+        self.embeddings = _Embeddings(self)
+        self.requests = self.rate_limited = 0
+        self.batch_sizes: list[int] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def with_options(self, **kwargs) -> "FakeOpenAI":
+        return self
+
+    def vector(self, text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+
+    def _embed(self, model: str, texts: list[str]):
+        with self._lock:
+            self.requests += 1
+            limited = self._rng.random() < self.rate_limit_p
+            if limited:
+                self.rate_limited += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if limited:
+            raise _error(openai.RateLimitError, 429, "Rate limit reached (fake)", "embeddings",
+                         {"retry-after": str(self.retry_after)})
+        counts = [count_tokens(t, model) for t in texts]
+        if len(texts) > self.max_inputs or sum(counts) > self.max_request_tokens or max(counts, default=0) > self.max_input_tokens:
+            raise _error(openai.BadRequestError, 400, "Request exceeds token/input limits (fake)", "embeddings")
+        with self._lock:
+            self.batch_sizes.append(len(texts))
+        data = [SimpleNamespace(index=i, embedding=self.vector(t).tolist()) for i, t in enumerate(texts)]
+        return SimpleNamespace(data=data, model=model)
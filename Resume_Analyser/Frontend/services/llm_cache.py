@@ -0,0 +1,115 @@
+# Frontend/services/llm_cache.py
+"""
+Persistent cache of LLM responses, shared by every Streamlit session and
+process on the host (one SQLite file, WAL journal).
+
+Entries are keyed on sha256(kind, model, prompt version, normalized text,
+params). The prompt version changes whenever the template changes, so an
+edited prompt can never be served an old answer; invalidate() deletes the
+entries of other versions (services.ai does that on first use).
+
+Eviction: entries older than ttl_s are dropped, and past max_entries the
+least recently used go first.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from shared.jd_profile import text_hash
+
+
+def prompt_version(template: str, tag: str = "v1") -> str:
+    return f"{tag}-{hashlib.sha256(template.encode('utf-8')).hexdigest()[:10]}"
+
+
+class LLMCache:
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, kind TEXT NOT NULL, model TEXT NOT NULL, prompt_version TEXT NOT NULL,
+            value TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0);
+        CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+    """
+
+    def __init__(self, path: str, max_entries: int = 20_000, ttl_s: float = 30 * 86400):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+        self.hits = self.misses = self.coalesced = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(self._SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(kind: str, model: str, version: str, text: str, **params) -> str:
+        raw = json.dumps([kind, model, version, text_hash(text), params], sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, attr: str):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def note_coalesced(self):
+        # a caller joined a request already in flight instead of issuing its own
+        self._count("coalesced")
+
+    def get(self, key: str) -> Optional[Any]:
+        conn, now = self._conn(), time.time()
+        row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or now - row[1] > self.ttl_s:
+            self._count("misses")
+            return None
+        conn.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        self._count("hits")
+        return json.loads(row[0])
+
+    def put(self, key: str, kind: str, model: str, version: str, value: Any):
+        conn, now = self._conn(), time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR REPLACE INTO responses (key, kind, model, prompt_version, value, created, last_used)"
+                         " VALUES (?, ?, ?, ?, ?, ?, ?)", (key, kind, model, version, json.dumps(value), now, now))
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_s,))
+            (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                conn.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                             (count - self.max_entries,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def invalidate(self, kind: Optional[str] = None, keep_version: Optional[str] = None) -> int:
+        """
+        Delete entries (of one kind, optionally all but keep_version); returns the count.
+        """
+        sql, args = "DELETE FROM responses WHERE 1=1", []
+        if kind is not None:
+            sql, args = sql + " AND kind = ?", args + [kind]
+        if keep_version is not None:
+            sql, args = sql + " AND prompt_version != ?", args + [keep_version]
+        return self._conn().execute(sql, args).rowcount
+
+    def stats(self) -> dict:
+        (entries,) = self._conn().execute("SELECT COUNT(*) FROM responses").fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "coalesced": self.coalesced,
+            "entries": entries,
+        }
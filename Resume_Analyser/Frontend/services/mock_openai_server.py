@@ -0,0 +1,181 @@
+# Frontend/services/mock_openai_server.py
+"""
+Local mock of the OpenAI HTTP API (chat completions + embeddings) for
+exercising services.ai end to end without a key or network:
+
+    python -m services.mock_openai_server --port 8787 --latency 1.0   (from Frontend/)
+    OPENAI_BASE_URL=http://127.0.0.1:8787/v1 OPENAI_API_KEY=mock streamlit run app.py
+
+Chat completions answer skill-extraction prompts with a JSON array of the
+words after "TEXT:" and anything else with a short canned plan; embeddings
+are services.fake_openai vectors. Every request waits `latency` seconds,
+and a `rate_limit` fraction gets a 429. With "stream": true the reply is
+sent as server-sent events, one word every `token_delay` seconds, like
+the real API. In-process use:
+
+    with MockOpenAIServer(latency=1.0) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from services.fake_openai import FakeOpenAI
+
+CANNED_PLAN = ("1) SUMMARY\n- Lead with your strongest matching skills and years of experience.\n"
+               "- Name the target role and the domain you want to grow in.\n\n"
+               "2) EXPERIENCE\n- Designed and shipped a data pipeline that cut reporting time by 40%.\n"
+               "- Led migration of batch jobs to the cloud, reducing cost by 25%.\n"
+               "- Automated quality checks that caught 95% of data issues before release.\n\n"
+               "3) KEYWORDS\nweave the missing skills into your most recent roles, naturally.\n\n"
+               "4) PROJECT\nBuild a small end-to-end project that combines two or three missing skills.\n")
+
+
+def _skills_reply(prompt: str) -> str:
+    text = prompt.split("TEXT:", 1)[1] if "TEXT:" in prompt else prompt
+    words = [w.lower() for w in re.findall(r"[A-Za-z][A-Za-z+#.]{2,}", text)]
+    return json.dumps(list(dict.fromkeys(words))[:60])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "MockOpenAIServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: dict, headers: dict | None = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        srv = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        with srv.lock:
+            srv.requests += 1
+            srv.in_flight += 1
+            srv.max_in_flight = max(srv.max_in_flight, srv.in_flight)
+        try:
+            time.sleep(srv.latency)
+            if srv.rng.random() < srv.rate_limit:
+                return self._send(429, {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit"}},
+                                  {"Retry-After": "0.05"})
+            if self.path.endswith("/chat/completions"):
+                return self._chat(body)
+            if self.path.endswith("/embeddings"):
+                return self._embeddings(body)
+            self._send(404, {"error": {"message": f"no mock for {self.path}"}})
+        finally:
+            with srv.lock:
+                srv.in_flight -= 1
+
+    def _chat(self, body: dict):
+        prompt = body["messages"][-1]["content"]
+        content = _skills_reply(prompt) if "SKILLS/TOOLS/KEYWORDS" in prompt else CANNED_PLAN
+        if body.get("stream"):
+            return self._stream(body, content)
+        time.sleep(self.server.token_delay * len(content.split()))  # generation time, all at once
+        self._send(200, {
+            "id": f"chatcmpl-mock-{self.server.requests}", "object": "chat.completion",
+            "created": int(time.time()), "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    def _stream(self, body: dict, content: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        base = {"id": f"chatcmpl-mock-{self.server.requests}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": body.get("model", "mock")}
+
+        def event(delta: dict, finish=None):
+            payload = dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish}])
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        for token in re.findall(r"\S+\s*", content):
+            event({"content": token})
+            time.sleep(self.server.token_delay)
+        event({}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _embeddings(self, body: dict):
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        data = [{"object": "embedding", "index": i, "embedding": self.server.fake.vector(t).tolist()}
+                for i, t in enumerate(inputs)]
+        self._send(200, {"object": "list", "data": data, "model": body.get("model", "mock"),
+                         "usage": {"prompt_tokens": 0, "total_tokens": 0}})
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 rate_limit: float = 0.0, token_delay: float = 0.02, seed: int = 0):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.rate_limit = rate_limit
+        self.rng = random.Random(seed)
+        self.fake = FakeOpenAI()
+        self.lock = threading.Lock()
+        self.requests = self.in_flight = self.max_in_flight = 0
+        self._thread: threading.Thread | None = None
+
+    def handle_error(self, request, client_address):
+        # clients that time out hang up mid-response; that is expected here
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockOpenAIServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "MockOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m services.mock_openai_server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8787)
+    ap.add_argument("--latency", type=float, default=1.0, help="seconds per request")
+    ap.add_argument("--rate-limit", type=float, default=0.0, help="fraction of requests answered with 429")
+    ap.add_argument("--token-delay", type=float, default=0.02, help="seconds between streamed tokens")
+    args = ap.parse_args()
+    server = MockOpenAIServer(args.host, args.port, args.latency, args.rate_limit, args.token_delay)
+    print(f"mock OpenAI API on {server.base_url}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Frontend/services/prompt_budget.py
+"""
+Token budgeting for the resume/JD text sent to the LLM.
+
+Both inputs are measured with services.tokens. When they do not fit the
+budget, the resume is split into sections (headings such as EXPERIENCE or
+"Skills:", else blank-line blocks) and the sections most relevant to the JD
+are kept, ranked by the same JD-weighted keyword coverage
+match_resume_with_jd reports (JDProfile.score_terms). Kept sections stay in
+their original order. A JD longer than its share is truncated.
+
+    LLM_PROMPT_TOKEN_BUDGET   tokens of resume + JD text per call (6000)
+"""
+import os
+import re
+from dataclasses import dataclass
+from shared.jd_profile import cached_profile
+from shared.keywords import extract_keywords_blocks
+from services.tokens import count_tokens, truncate_tokens
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "6000"))
+# JD share of a pair budget when both inputs are too long
+_JD_SHARE = 0.35
+# smallest leftover worth filling with the start of a section that did not fit
+_MIN_PARTIAL_TOKENS = 64
+
+_HEADINGS = {
+    "summary", "profile", "professional summary", "objective", "about me",
+    "experience", "work experience", "professional experience", "employment", "employment history",
+    "education", "projects", "personal projects", "skills", "technical skills", "core skills",
+    "certifications", "certificates", "awards", "achievements", "publications", "languages",
+    "interests", "volunteering", "volunteer experience", "leadership", "training", "courses",
+    "responsibilities", "requirements", "qualifications", "nice to have", "benefits", "about the role",
+}
+
+
+@dataclass
+class BudgetReport:
+    label: str
+    tokens_in: int
+    tokens_out: int
+    sections_in: int = 1
+    sections_kept: int = 1
+
+    @property
+    def saved(self) -> int:
+        return self.tokens_in - self.tokens_out
+
+    def __str__(self) -> str:
+        return (f"{self.label}: {self.tokens_out:,}/{self.tokens_in:,} tokens ({self.saved:,} saved, "
+                f"{self.sections_kept}/{self.sections_in} sections)")
+
+
+def _is_heading(line: str) -> bool:
+    s = line.strip().strip("#*_ ").rstrip(":").strip()
+    if not s or len(s) > 40 or len(s.split()) > 4:
+        return False
+    return s.lower() in _HEADINGS or (s.isupper() and any(c.isalpha() for c in s))
+
+def split_sections(text: str) -> list[str]:
+    """
+    Heading-delimited sections (text before the first heading is its own
+    section); blank-line blocks when fewer than two headings are found.
+    """
+    lines = (text or "").splitlines()
+    starts = [i for i, line in enumerate(lines) if _is_heading(line)]
+    if len(starts) >= 2:
+        bounds = ([0] if starts[0] > 0 else []) + starts + [len(lines)]
+        sections = ["\n".join(lines[a:b]).strip() for a, b in zip(bounds, bounds[1:])]
+    else:
+        sections = [b.strip() for b in re.split(r"\n\s*\n", text or "")]
+    return [s for s in sections if s]
+
+def rank_sections(sections: list[str], jd_text: str) -> list[int]:
+    """
+    Section indices, most JD-relevant first (ties keep document order).
+    """
+    profile = cached_profile(jd_text)
+    scores = [profile.score_terms(extract_keywords_blocks(s)[0])[2] for s in sections]
+    return sorted(range(len(sections)), key=lambda i: (-scores[i], i))
+
+def compress(text: str, max_tokens: int, model: str, jd_text: str | None = None,
+             label: str = "resume") -> tuple[str, BudgetReport]:
+    """
+    Fit text into max_tokens by keeping whole sections, the most relevant to
+    jd_text first (document order without a JD); leftover room takes the
+    start of the best section that did not fit.
+    """
+    text = text or ""
+    n = count_tokens(text, model)
+    if n <= max_tokens:
+        return text, BudgetReport(label, n, n)
+    sections = split_sections(text)
+    order = rank_sections(sections, jd_text) if jd_text else range(len(sections))
+    sizes = [count_tokens(s, model) for s in sections]
+    # sections are re-joined with a blank line; count it against the budget
+    sep = count_tokens("\n\n", model)
+    kept, used, skipped = {}, 0, []
+    for i in order:
+        cost = sizes[i] + (sep if kept else 0)
+        if used + cost <= max_tokens:
+            kept[i] = sections[i]
+            used += cost
+        else:
+            skipped.append(i)
+    # the most relevant section that did not fit fills what is left, cut short
+    room = max_tokens - used - (sep if kept else 0)
+    if skipped and room >= min(_MIN_PARTIAL_TOKENS, max_tokens):
+        kept[skipped[0]] = truncate_tokens(sections[skipped[0]], room, model)
+    out = "\n\n".join(kept[i] for i in sorted(kept))
+    return out, BudgetReport(label, n, count_tokens(out, model), len(sections), len(kept))
+
+def fit_pair(resume_text: str, jd_text: str, model: str,
+             budget: int = PROMPT_TOKEN_BUDGET) -> tuple[str, str, list[BudgetReport]]:
+    """
+    Budget resume + JD together: the JD keeps what it needs up to its share
+    (the whole budget minus the resume's needs if that is more), the resume
+    gets the rest and is compressed by relevance to the full JD.
+    """
+    jd_n, res_n = count_tokens(jd_text or "", model), count_tokens(resume_text or "", model)
+    jd_budget = max(int(budget * _JD_SHARE), budget - res_n)
+    jd_out = jd_text or ""
+    if jd_n > jd_budget:
+        jd_out = truncate_tokens(jd_out, jd_budget, model)
+    jd_report = BudgetReport("job description", jd_n, count_tokens(jd_out, model))
+    resume_out, resume_report = compress(resume_text, budget - jd_report.tokens_out, model, jd_text)
+    return resume_out, jd_out, [resume_report, jd_report]
@@ -0,0 +1,43 @@
+# Frontend/services/tokens.py
+"""
+Token counting for OpenAI requests (tiktoken).
+
+tiktoken downloads its BPE files on first use; when that is impossible
+(offline, locked-down hosts) counts fall back to a conservative estimate
+of one token per two UTF-8 bytes, so budgets are still respected.
+"""
+from functools import lru_cache
+
+
+class _ByteEstimate:
+    # Stand-in encoding: one "token" per 2 bytes, never undercounts English BPE
+    def encode(self, text: str) -> list[int]:
+        data = text.encode("utf-8")
+        return list(range((len(data) + 1) // 2))
+
+    def decode_prefix(self, text: str, n_tokens: int) -> str:
+        return text.encode("utf-8")[:2 * n_tokens].decode("utf-8", errors="ignore")
+
+
+@lru_cache(maxsize=8)
+def encoding_for(model: str):
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return _ByteEstimate()
+
+def count_tokens(text: str, model: str) -> int:
+    return len(encoding_for(model).encode(text or ""))
+
+def truncate_tokens(text: str, max_tokens: int, model: str) -> str:
+    enc = encoding_for(model)
+    tokens = enc.encode(text or "")
+    if len(tokens) <= max_tokens:
+        return text
+    if isinstance(enc, _ByteEstimate):
+        return enc.decode_prefix(text, max_tokens)
+    return enc.decode(tokens[:max_tokens])
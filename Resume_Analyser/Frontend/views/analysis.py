@@ -1,35 +1,34 @@
-from services.ai import extract_skill_bag, semantic_match, generate_suggestions
+from services.ai import extract_skill_bags, semantic_top_k, apply_threshold, stream_suggestions, embedding_stats
+import hashlib
 import io
-import re
 from collections import Counter
-from typing import Tuple, Set, List
+from functools import lru_cache
+from typing import List, Optional
+from shared import taxonomy
+from shared.jd_profile import JDProfile, cached_profile
+from shared.keywords import extract_keywords_blocks
+from shared.pdf_extract import extract_pdf
+
+import streamlit as st
 
 def _init_state():
     st.session_state.setdefault("resume_text_input", "")
     st.session_state.setdefault("jd_text_input", "")
     st.session_state.setdefault("ai_mode", None)     # None | "match" | "suggest"
     st.session_state.setdefault("threshold", 0.78)
-
-import streamlit as st
+    st.session_state.setdefault("analyzed", False)   # keyword results stay up across reruns
+    st.session_state.setdefault("ai_bags", None)          # last AI skill extraction
+    st.session_state.setdefault("ai_suggestions", None)
 
 # ---------- File reading helpers ----------
 def read_pdf(file) -> str:
-    # Try pdfplumber first (best text fidelity), fallback to PyPDF2
+    # Page-parallel extraction with per-page backend fallback; the backend
+    # uses the same module, so both sides see identical text
     try:
-        import pdfplumber
-        text = []
-        with pdfplumber.open(file) as pdf:
-            for page in pdf.pages:
-                text.append(page.extract_text() or "")
-        return "\n".join(text).strip()
+        data = file.getvalue() if hasattr(file, "getvalue") else file.read()
     except Exception:
-        try:
-            from PyPDF2 import PdfReader
-            reader = PdfReader(file)
-            pages = [page.extract_text() or "" for page in reader.pages]
-            return "\n".join(pages).strip()
-        except Exception:
-            return ""
+        return ""
+    return extract_pdf(data)
 
 def read_docx(file) -> str:
     try:
@@ -69,81 +68,46 @@ def get_text_from_upload(file) -> str:
     # Unknown extension → try naive read
     return read_txt(file)
 
-# ---------- NLP-lite helpers ----------
-STOPWORDS = {
-    "and","or","with","the","to","a","in","for","of","on","at","is","are",
-    "be","as","by","from","an","that","this","it","you","your","we","our",
-    "will","can","able","etc","using","use","about","into","per","across",
-    "such","via","over","under","within","their","they","them"
-}
-
-# Optional light normalization map to reduce variants
-NORMALIZE_MAP = {
-    "ml": "machine learning",
-    "ai": "artificial intelligence",
-    "nlp": "natural language processing",
-    "db": "database",
-    "dbs": "database",
-    "oop": "object oriented programming",
-    "sqlserver": "sql server",
-    "powerbi": "power bi",
-    "tableau": "tableau",
-    "gcp": "google cloud",
-    "aws": "amazon web services",
-    "azuredevops": "azure devops",
-    "jira": "jira",
-    "confluence": "confluence",
-    "tfidf": "tf idf",
-    "tf-idf": "tf idf",
-    "tf": "tensorflow",
-    "sklearn": "scikit learn",
-    "scikit-learn": "scikit learn",
-    "py": "python",
-    "python3": "python",
-    "js": "javascript",
-    "ts": "typescript"
-}
-
-def normalize_token(tok: str) -> str:
-    t = tok.lower().strip()
-    t = re.sub(r"[^a-z0-9+#.\- ]", "", t)
-    t = NORMALIZE_MAP.get(t, t)
-    return t
-
-def extract_keywords_blocks(text: str) -> Tuple[Set[str], Counter]:
-    """
-    Extracts unigrams + simple bigrams, filters stopwords/numbers,
-    returns unique keyword set and a frequency Counter for weighting.
-    """
-    if not text:
-        return set(), Counter()
-
-    # Unigrams
-    tokens = [normalize_token(t) for t in re.findall(r"\b[^\W_]+\b", text.lower())]
-    tokens = [t for t in tokens if len(t) > 2 and t not in STOPWORDS]
-
-    # Bigrams (simple & fast)
-    bigrams = [f"{tokens[i]} {tokens[i+1]}" for i in range(len(tokens) - 1)]
-    bigrams = [b for b in bigrams
-               if all(w not in STOPWORDS and len(w) > 2 for w in b.split())]
+# ---------- Incremental pipeline (cached stages) ----------
+# Every widget interaction reruns the script; each stage is cached on its
+# input content so a rerun only recomputes what actually changed:
+#   upload bytes  -> text                    (_upload_text, sha256 of the bytes)
+#   resume text   -> tokens + keyword set    (_resume_keywords)
+#   JD text       -> JDProfile               (shared.jd_profile.cached_profile)
+#   texts         -> AI skill bags           (_extract_bags, plus the LLM cache)
+#   skill bags    -> top-k similarities      (_skill_top_k, embeddings disk-cached)
+# The semantic threshold is applied to the cached similarities on every run.
+@st.cache_data(show_spinner=False, max_entries=32)
+def _extract_upload(name: str, digest: str, _data: bytes) -> str:
+    # keyed on (name, digest); _data is not hashed by Streamlit
+    bio = io.BytesIO(_data)
+    bio.name = name
+    return get_text_from_upload(bio)
+
+def upload_text(file) -> str:
+    if file is None:
+        return ""
+    data = file.getvalue()
+    return _extract_upload(file.name or "", hashlib.sha256(data).hexdigest(), data)
 
-    all_terms = tokens + bigrams
-    freq = Counter(all_terms)
-    return set(all_terms), freq
+# ---------- NLP-lite helpers ----------
+# Tokenizer / n-gram engine lives in shared/keywords.py (also used by the backend)
+@lru_cache(maxsize=32)
+def _resume_keywords_cached(resume_text: str, taxonomy_version: int):
+    return extract_keywords_blocks(resume_text)
 
-def match_resume_with_jd(resume_text: str, jd_text: str):
-    res_set, res_freq = extract_keywords_blocks(resume_text)
-    jd_set, jd_freq = extract_keywords_blocks(jd_text)
+def _resume_keywords(resume_text: str):
+    # keyed on the taxonomy version like the JD side, so a reload re-normalizes both
+    return _resume_keywords_cached(resume_text, taxonomy.current().version)
 
-    matched = sorted(res_set.intersection(jd_set), key=lambda k: (-jd_freq[k], k))
-    missing = sorted((jd_set - res_set), key=lambda k: (-jd_freq[k], k))
+def match_resume_with_jd(resume_text: str, jd_text: str, profile: Optional[JDProfile] = None):
+    profile = profile or cached_profile(jd_text)
+    res_set, res_freq = _resume_keywords(resume_text)
 
     # Basic score: % of JD terms covered (weighted by JD frequency)
-    jd_total_weight = sum(jd_freq.values()) or 1
-    covered_weight = sum(jd_freq[t] for t in matched)
-    score = round(100 * covered_weight / jd_total_weight, 1)
+    matched, missing, score = profile.score_terms(res_set)
 
-    return matched, missing, score, jd_freq, res_freq
+    return matched, missing, score, profile.freq, res_freq
 
 # ---------- Actionable suggestions ----------
 def suggest_edits(missing: List[str], jd_text: str, top_k: int = 15) -> List[str]:
@@ -239,9 +203,123 @@ def display_results(matched, missing, score, jd_freq):
 - Prioritise **relevant** skills/experience first.
                 """
             )
+# ---------- AI matching & suggestions ----------
+@st.cache_data(show_spinner=False)
+def _extract_bags(resume_text, jd_text):
+    # both completions in flight at once, each text fitted to the prompt budget
+    reports = []
+    jd_skills, rs_skills = extract_skill_bags([jd_text, resume_text], jd_text=jd_text, reports=reports)
+    return jd_skills, rs_skills, reports
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _skill_top_k(jd_skills: tuple, rs_skills: tuple, provider: str | None):
+    return semantic_top_k(list(jd_skills), list(rs_skills), k=3, provider=provider)
+
+def _ai_section(resume_text: str, jd_text: str):
+    st.markdown("### 🔮 AI Matching & Suggestions")
+
+    ai_cols = st.columns([1,1,1])
+    with ai_cols[0]:
+        run_ai = st.button("Run AI Match", type="primary")
+        if run_ai:
+            st.session_state.ai_mode = "match"
+
+    with ai_cols[1]:
+        suggest_ai = st.button("Generate AI Suggestions")
+        if suggest_ai:
+            st.session_state.ai_mode = "suggest"
+
+    with ai_cols[2]:
+        threshold = st.slider("Semantic threshold", 0.60, 0.90, step=0.01, key="threshold",
+                              help="Higher = stricter matching")
+
+    if not st.session_state.ai_mode:
+        return
+    # LLM calls only on a click; other reruns (edits, slider) reuse the last bags
+    key = hashlib.sha256(f"{resume_text}\0{jd_text}".encode("utf-8")).hexdigest()
+    bags = st.session_state.ai_bags
+    if run_ai or suggest_ai:
+        if not resume_text or not jd_text:
+            st.warning("Please provide both Resume and Job Description.")
+            return
+        with st.spinner("Extracting skills with AI…"):
+            jd_skills, rs_skills, budget = _extract_bags(resume_text, jd_text)
+        bags = st.session_state.ai_bags = {"key": key, "jd": jd_skills, "resume": rs_skills, "budget": budget}
+    elif bags is None:
+        return
+    elif bags["key"] != key:
+        st.caption("Resume or JD changed since the last AI match — run it again to update these results.")
+    jd_skills, rs_skills = bags["jd"], bags["resume"]
+    for who, report in zip(("JD", "Resume"), bags["budget"]):
+        st.caption(f"Prompt budget · {who} {report}")
+
+    st.write("**JD skills (AI):**", ", ".join(jd_skills[:30]))
+    st.write("**Resume skills (AI):**", ", ".join(rs_skills[:30]))
+
+    provider = st.session_state.get("embed_provider")
+    with st.spinner("Computing semantic matches…"):
+        top = _skill_top_k(tuple(jd_skills), tuple(rs_skills), provider)
+    # only this step depends on the slider
+    matched, missing, scores = apply_threshold(top, threshold)
+
+    emb = embedding_stats(provider)
+    if emb:
+        st.caption(f"Embedding cache: {emb['hits']} hits / {emb['misses']} misses in this process "
+                   f"({100 * emb['hit_rate']:.0f}%), {100 * emb['total_hit_rate']:.0f}% overall, "
+                   f"{emb['disk_entries']} strings stored")
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Matched (semantic)", len(matched))
+    m2.metric("Missing (priority)", len(missing))
+    m3.metric("Match %", round(100*len(matched)/max(1,len(jd_skills))))
+
+    st.subheader("Matched Skills")
+    if matched:
+        st.write(", ".join(sorted(matched)))
+    else:
+        st.caption("No strong semantic matches at current threshold.")
+
+    st.subheader("Missing / Low-Score Skills")
+    if missing:
+        st.write(", ".join(sorted(missing)))
+        # small table with scores
+        import pandas as pd
+        st.dataframe(
+            pd.DataFrame(
+                [{"skill": s, "similarity": round(scores.get(s, 0.0), 3),
+                  "closest resume skills": ", ".join(p for p, _ in top.get(s, []))} for s in missing]
+            ).sort_values("similarity", ascending=False),
+            use_container_width=True, height=280
+        )
+    else:
+        st.caption("Great! Nothing critical appears missing.")
+
+    if st.session_state.ai_mode == "suggest":
+        st.markdown("### ✍️ AI Suggestions")
+        # generated on request only; reruns (slider, edits) show the saved plan
+        saved = st.session_state.ai_suggestions
+        if suggest_ai:
+            with st.spinner("Drafting tailored suggestions…"):
+                stream = stream_suggestions(resume_text, jd_text, missing, matched)
+            st.write_stream(stream)
+            saved = st.session_state.ai_suggestions = {
+                "key": key, "text": stream.text, "ttft_s": stream.ttft_s, "total_s": stream.total_s,
+                "budget": [str(r) for r in stream.budget],
+            }
+        elif saved and saved["key"] == key:
+            st.markdown(saved["text"])
+        else:
+            st.caption("Resume or JD changed since the last suggestions — generate them again.")
+            return
+        if saved["ttft_s"] is not None:
+            st.caption(f"First token after {saved['ttft_s']:.2f}s · complete in {saved['total_s']:.1f}s")
+        for report in saved["budget"]:
+            st.caption(f"Prompt budget · {report}")
+
 # ---------- Main Streamlit view function ----------
 # ---------- Streamlit UI ----------
 def view_analysis():
+    _init_state()
     st.title("📊 Resume Analysis")
 
     st.caption("Upload your resume and job description (PDF/DOCX/TXT) or paste text. We'll find matches, gaps, and tell you exactly what to do next.")
@@ -253,7 +331,7 @@ def view_analysis():
         resume_text = st.text_area("…or paste resume text", height=220, key="resume_text")
 
         if resume_file and not resume_text:
-            extracted = get_text_from_upload(resume_file)
+            extracted = upload_text(resume_file)
             if not extracted:
                 st.warning("Couldn't read the uploaded resume. Try a different format or paste the text.")
             else:
@@ -265,7 +343,7 @@ def view_analysis():
         jd_text = st.text_area("…or paste JD text", height=220, key="jd_text")
 
         if jd_file and not jd_text:
-            extracted = get_text_from_upload(jd_file)
+            extracted = upload_text(jd_file)
             if not extracted:
                 st.warning("Couldn't read the uploaded JD. Try a different format or paste the text.")
             else:
@@ -275,8 +353,10 @@ def view_analysis():
     if st.button("Analyze 🔎", use_container_width=True):
         if not resume_text or not jd_text:
             st.error("Please provide both resume and job description (upload or paste) before analyzing.")
-            return
+        st.session_state.analyzed = bool(resume_text and jd_text)
 
+    # Results follow the inputs on every rerun; unchanged stages come from cache
+    if st.session_state.analyzed and resume_text and jd_text:
         matched, missing, score, jd_freq, res_freq = match_resume_with_jd(resume_text, jd_text)
 
                 # Clean, professional layout
@@ -294,66 +374,5 @@ def view_analysis():
             st.write("**Top Resume terms (by frequency):**")
             res_top = Counter({k: res_freq[k] for k in res_freq}).most_common(30)
             st.write(res_top)
-    st.markdown("### 🔮 AI Matching & Suggestions")
-
-ai_cols = st.columns([1,1,1])
-with ai_cols[0]:
-    run_ai = st.button("Run AI Match", type="primary")
-
-with ai_cols[1]:
-    suggest_ai = st.button("Generate AI Suggestions")
-
-with ai_cols[2]:
-    threshold = st.slider("Semantic threshold", 0.60, 0.90, 0.78, 0.01, help="Higher = stricter matching")
-
-# Cache extraction to avoid re-billing on rerun
-@st.cache_data(show_spinner=False)
-def _extract_bags(resume_text, jd_text):
-    jd_skills = extract_skill_bag(jd_text)
-    rs_skills = extract_skill_bag(resume_text)
-    return jd_skills, rs_skills
-
-if run_ai or suggest_ai:
-    if not resume_text or not jd_text:
-        st.warning("Please provide both Resume and Job Description.")
-    else:
-        with st.spinner("Extracting skills with AI…"):
-            jd_skills, rs_skills = _extract_bags(resume_text, jd_text)
-
-        st.write("**JD skills (AI):**", ", ".join(jd_skills[:30]))
-        st.write("**Resume skills (AI):**", ", ".join(rs_skills[:30]))
-
-        with st.spinner("Computing semantic matches…"):
-            matched, missing, scores = semantic_match(jd_skills, rs_skills, threshold=threshold)
-
-        m1, m2, m3 = st.columns(3)
-        m1.metric("Matched (semantic)", len(matched))
-        m2.metric("Missing (priority)", len(missing))
-        m3.metric("Match %", round(100*len(matched)/max(1,len(jd_skills))))
-
-        st.subheader("Matched Skills")
-        if matched:
-            st.write(", ".join(sorted(matched)))
-        else:
-            st.caption("No strong semantic matches at current threshold.")
-
-        st.subheader("Missing / Low-Score Skills")
-        if missing:
-            st.write(", ".join(sorted(missing)))
-            # small table with scores
-            import pandas as pd
-            st.dataframe(
-                pd.DataFrame(
-                    [{"skill": s, "similarity": round(scores.get(s, 0.0), 3)} for s in missing]
-                ).sort_values("similarity", ascending=False),
-                use_container_width=True, height=280
-            )
-        else:
-            st.caption("Great! Nothing critical appears missing.")
-
-        if suggest_ai:
-            with st.spinner("Drafting tailored suggestions…"):
-                advice = generate_suggestions(resume_text, jd_text, missing, matched)
-            st.markdown("### ✍️ AI Suggestions")
-            st.write(advice)
 
+    _ai_section(resume_text, jd_text)
@@ -1,6 +1,8 @@
 import json
 import os
 import streamlit as st
+from services.embeddings import PROVIDERS, DEFAULT_PROVIDER, get_provider
+from services.ai import llm_cache
 
 # lightweight translation helper
 def t(key: str) -> str:
@@ -78,6 +80,30 @@ def view():
 
     st.divider()
 
+    # ========== AI ==========
+    st.markdown("### AI")
+    current = st.session_state.get("embed_provider", DEFAULT_PROVIDER)
+    names = [n for n, p in PROVIDERS.items() if p.listed or n == current]
+    st.session_state.embed_provider = st.selectbox(
+        "Embedding provider (semantic match)", names,
+        index=names.index(current) if current in names else 0,
+        format_func=lambda n: PROVIDERS[n].label,
+    )
+    st.caption("Local MiniLM runs offline on CPU; its similarities run lower than OpenAI's, "
+               "so a lower semantic threshold may suit it. Embeddings are cached on disk per model.")
+    cache_stats = get_provider(st.session_state.embed_provider).stats()
+    if cache_stats:
+        st.caption(f"Embedding cache: {cache_stats}")
+
+    a1, a2 = st.columns(2)
+    with a1:
+        st.caption(f"AI response cache: {llm_cache().stats()}")
+    with a2:
+        if st.button("Clear AI response cache", use_container_width=True):
+            st.toast(f"Removed {llm_cache().invalidate()} cached AI responses.", icon="🧹")
+
+    st.divider()
+
     # ========== Data ==========
     st.markdown("### Data")
     col1, col2 = st.columns(2)
@@ -90,6 +116,7 @@ def view():
                 "density": st.session_state.density,
                 "animations": st.session_state.animations,
                 "persist_history": st.session_state.persist_history,
+                "embed_provider": st.session_state.embed_provider,
             }
             st.download_button("⬇️ Download settings.json",
                                data=json.dumps(payload, indent=2).encode("utf-8"),
@@ -100,7 +127,7 @@ def view():
             try:
                 cfg = json.load(uploaded)
                 for k, v in cfg.items():
-                    if k in ("theme","language","accent","density","animations","persist_history"):
+                    if k in ("theme","language","accent","density","animations","persist_history","embed_provider"):
                         st.session_state[k] = v
                 st.success("Settings imported.")
                 st.rerun()
@@ -124,7 +151,7 @@ def view():
     with d2:
         if st.button("Reset preferences", type="secondary", use_container_width=True):
             for k, v in {"theme":"Dark","language":"English","accent":"#7c3aed","density":"Comfortable",
-                         "animations":True,"persist_history":False}.items():
+                         "animations":True,"persist_history":False,"embed_provider":DEFAULT_PROVIDER}.items():
                 st.session_state[k] = v
             st.success("Preferences reset.")
             st.rerun()
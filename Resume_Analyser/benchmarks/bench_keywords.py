@@ -0,0 +1,87 @@
+"""
+Micro-benchmark: shared.keywords.extract_keywords_blocks vs the previous
+regex + per-token re.sub + bigram-string implementation.
+
+Every timed call gets a document neither implementation has seen: a file
+is timed once per call with nothing cached across calls, and synthetic
+resumes are fresh draws per repeat. --unique makes most tokens distinct
+(worst case for per-token normalization).
+
+    python benchmarks/bench_keywords.py [resume.txt] [--pages 10] [--repeat 20] [--unique]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared import taxonomy
+from shared.keywords import STOPWORDS, extract_keywords_blocks
+
+WORDS_PER_PAGE = 500
+
+
+def legacy_extract_keywords_blocks(text):
+    norm = taxonomy.current().normalize
+
+    def normalize_token(tok):
+        t = tok.lower().strip()
+        t = re.sub(r"[^a-z0-9+#.\- ]", "", t)
+        return norm.get(t, t)
+
+    tokens = [normalize_token(t) for t in re.findall(r"\b[^\W_]+\b", text.lower())]
+    tokens = [t for t in tokens if len(t) > 2 and t not in STOPWORDS]
+    bigrams = [f"{tokens[i]} {tokens[i+1]}" for i in range(len(tokens) - 1)]
+    bigrams = [b for b in bigrams if all(w not in STOPWORDS and len(w) > 2 for w in b.split())]
+    all_terms = tokens + bigrams
+    return set(all_terms), Counter(all_terms)
+
+def synthetic_resume(pages, seed=7, unique=False):
+    rng = random.Random(seed)
+    vocab = (list(STOPWORDS) + list(taxonomy.current().normalize)
+             + [f"term{i}" for i in range(1500)]
+             + "python sql pipelines dashboards stakeholders forecasting kubernetes etl".split())
+    if unique:
+        words = [f"w{seed}x{rng.getrandbits(40):x}" if rng.random() < 0.8 else rng.choice(vocab)
+                 for _ in range(pages * WORDS_PER_PAGE)]
+    else:
+        words = [rng.choice(vocab) for _ in range(pages * WORDS_PER_PAGE)]
+    return " ".join(w.capitalize() if rng.random() < 0.2 else w for w in words) + "."
+
+def median_cold(fn, docs):
+    times = []
+    for doc in docs:
+        t = time.perf_counter()
+        fn(doc)
+        times.append(time.perf_counter() - t)
+    return sorted(times)[len(times) // 2]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("path", nargs="?")
+    ap.add_argument("--pages", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--unique", action="store_true", help="synthetic text with mostly distinct tokens")
+    args = ap.parse_args()
+
+    if args.path:
+        with open(args.path, "r", encoding="utf-8", errors="ignore") as f:
+            docs = [f.read()] * args.repeat
+    else:
+        docs = [synthetic_resume(args.pages, seed, args.unique) for seed in range(args.repeat)]
+
+    assert extract_keywords_blocks(docs[0]) == legacy_extract_keywords_blocks(docs[0]), "outputs differ"
+    # the check above warmed imports/regex caches only; timed documents are new to both
+    docs = docs if args.path else [synthetic_resume(args.pages, seed, args.unique)
+                                   for seed in range(args.repeat, 2 * args.repeat)]
+    old = median_cold(legacy_extract_keywords_blocks, docs)
+    new = median_cold(extract_keywords_blocks, docs)
+    print(f"text: {len(docs[0].split())} words, median of {len(docs)} cold calls")
+    print(f"legacy : {old * 1000:8.2f} ms")
+    print(f"current: {new * 1000:8.2f} ms   ({old / new:.2f}x)")
+
+if __name__ == "__main__":
+    main()
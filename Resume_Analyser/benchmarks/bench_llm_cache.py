@@ -0,0 +1,47 @@
+"""
+LLM skill-extraction cache + in-flight coalescing against the local mock
+OpenAI server: N concurrent "users" paste the same JD, then paste it again.
+
+    python benchmarks/bench_llm_cache.py [--users 8] [--latency 1.0]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "Frontend"))
+from services.mock_openai_server import MockOpenAIServer
+
+JD = "Senior data engineer: Python, SQL, Airflow, Spark, Kafka, AWS, Terraform, dbt."
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=8)
+    ap.add_argument("--latency", type=float, default=1.0)
+    args = ap.parse_args()
+
+    with MockOpenAIServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as cache_dir:
+        os.environ.update(OPENAI_BASE_URL=server.base_url, LLM_CACHE_DIR=cache_dir)
+        os.environ.setdefault("OPENAI_API_KEY", "mock")
+        from services import ai
+
+        for label in ("cold", "warm"):
+            before, t = server.requests, time.perf_counter()
+            with ThreadPoolExecutor(args.users) as pool:  # one thread per Streamlit session
+                bags = list(pool.map(lambda _: ai.extract_skill_bag(JD), range(args.users)))
+            assert all(b == bags[0] for b in bags)
+            print(f"{label}: {args.users} users, {server.requests - before} LLM request(s), "
+                  f"{time.perf_counter() - t:.2f}s")
+        print("cache:", ai.llm_cache().stats())
+
+        # a changed prompt template gets a new version, so old answers are dropped
+        dropped = ai.llm_cache().invalidate("skills", keep_version="v1-edited")
+        print(f"invalidated {dropped} entr{'y' if dropped == 1 else 'ies'} after a template change")
+
+if __name__ == "__main__":
+    main()
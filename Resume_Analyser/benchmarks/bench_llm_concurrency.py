@@ -0,0 +1,67 @@
+"""
+Latency of the AI-match skill extraction: two extract_skill_bag calls one
+after the other vs extract_skill_bags (both completions in flight at once),
+against the local mock OpenAI server.
+
+Every call must reach the server: the LLM response cache lives in a
+temporary LLM_CACHE_DIR (never Frontend/.cache/llm) and each run tags its
+texts with a fresh word, so neither mode is served from cache.
+
+    python benchmarks/bench_llm_concurrency.py [--latency 1.0] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "Frontend"))
+from services.mock_openai_server import MockOpenAIServer
+
+JD = "We need a data engineer with Python, SQL, Airflow, Spark and AWS experience."
+RESUME = "Data engineer. Built Spark and Airflow pipelines in Python on AWS; dashboards in Power BI."
+
+
+def _tag() -> str:
+    # letters only, so the mock server echoes it back as one skill
+    return uuid.uuid4().hex.translate(str.maketrans("0123456789", "ghijklmnop"))
+
+def _texts(tag: str) -> list[str]:
+    return [f"{JD} Ref {tag}", f"{RESUME} Ref {tag}"]
+
+def _untagged(bags: list[list[str]], tag: str) -> list[list[str]]:
+    return [[w for w in bag if w != tag] for bag in bags]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--latency", type=float, default=1.0)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir, MockOpenAIServer(latency=args.latency) as server:
+        # read when services.ai is imported
+        os.environ["LLM_CACHE_DIR"] = cache_dir
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "mock")
+        from services.ai import extract_skill_bag, extract_skill_bags
+
+        for _ in range(args.repeat):
+            seq_tag, conc_tag = _tag(), _tag()
+            before = server.requests
+            t = time.perf_counter()
+            sequential = [extract_skill_bag(text) for text in _texts(seq_tag)]
+            seq_s = time.perf_counter() - t
+            t = time.perf_counter()
+            concurrent = extract_skill_bags(_texts(conc_tag))
+            conc_s = time.perf_counter() - t
+            assert server.requests - before == 4, "a call was served from cache"
+            assert _untagged(concurrent, conc_tag) == _untagged(sequential, seq_tag)
+            print(f"sequential {seq_s:5.2f}s   concurrent {conc_s:5.2f}s   ({seq_s / conc_s:.1f}x)")
+        print(f"requests={server.requests} max in flight={server.max_in_flight}")
+
+if __name__ == "__main__":
+    main()
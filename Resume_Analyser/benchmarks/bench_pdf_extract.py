@@ -0,0 +1,105 @@
+"""
+PDF extraction: the old frontend path (pdfplumber, page after page) and the
+old backend path (pdfminer) against shared.pdf_extract in-process and over
+its process pool. Also checks that both sides now get identical text.
+
+Runs on a directory of PDFs (--corpus) or on synthetic multi-page resumes
+written here with a minimal PDF writer.
+
+    python benchmarks/bench_pdf_extract.py [--corpus DIR] [--docs 8] [--pages 12] [--workers 4]
+"""
+import argparse
+import glob
+import io
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from shared import pdf_extract
+
+WORDS = ("python sql spark airflow aws kafka docker kubernetes pipelines dashboards stakeholders "
+         "delivered reduced improved latency revenue customers migration automated designed led").split()
+
+
+def _escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def synthetic_pdf(pages: int, lines: int, rng: random.Random) -> bytes:
+    """
+    A valid multi-page PDF (Helvetica text, one content stream per page).
+    """
+    objs = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+            "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for p in range(pages):
+        body = [f"EXPERIENCE {p + 1}"] + [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(lines)]
+        stream = "BT /F1 10 Tf 50 780 Td 13 TL " + " ".join(f"({_escape(t)}) '" for t in body) + " ET"
+        objs.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objs.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                    f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objs)} 0 R >>")
+        kids.append(f"{len(objs)} 0 R")
+    objs[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+    out, offsets = io.BytesIO(), []
+    out.write(b"%PDF-1.4\n")
+    for i, obj in enumerate(objs, 1):
+        offsets.append(out.tell())
+        out.write(f"{i} 0 obj\n{obj}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode())
+    out.write("".join(f"{o:010d} 00000 n \n" for o in offsets).encode())
+    out.write(f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def old_frontend(data: bytes) -> str:
+    import pdfplumber
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return "\n".join(page.extract_text() or "" for page in pdf.pages).strip()
+
+def old_backend(data: bytes, max_pages: int) -> str:
+    import pdfminer.high_level
+    return pdfminer.high_level.extract_text(io.BytesIO(data), maxpages=max_pages) or ""
+
+
+def timed(fn, docs):
+    t = time.perf_counter()
+    out = [fn(d) for d in docs]
+    return out, time.perf_counter() - t
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--corpus", help="directory of PDFs (default: synthetic resumes)")
+    ap.add_argument("--docs", type=int, default=8)
+    ap.add_argument("--pages", type=int, default=12)
+    ap.add_argument("--lines", type=int, default=45)
+    ap.add_argument("--workers", type=int, default=pdf_extract.PDF_WORKERS)
+    args = ap.parse_args()
+
+    if args.corpus:
+        docs = [open(p, "rb").read() for p in sorted(glob.glob(os.path.join(args.corpus, "*.pdf")))]
+    else:
+        rng = random.Random(0)
+        docs = [synthetic_pdf(args.pages, args.lines, rng) for _ in range(args.docs)]
+    pages = sum(min(pdf_extract.page_count(d), 10_000) for d in docs)
+    print(f"{len(docs)} documents, {pages} pages, {os.cpu_count()} CPUs")
+
+    front, t_front = timed(old_frontend, docs)
+    back, t_back = timed(lambda d: old_backend(d, 10_000), docs)
+    serial, t_serial = timed(lambda d: pdf_extract.extract_pdf(d, None, workers=1), docs)
+    pdf_extract.extract_pdf(docs[0], None, workers=args.workers)  # start the pool
+    pooled, t_pool = timed(lambda d: pdf_extract.extract_pdf(d, None, workers=args.workers), docs)
+    pdf_extract.shutdown()
+
+    print(f"old frontend (pdfplumber):   {t_front:6.2f}s")
+    print(f"old backend (pdfminer):      {t_back:6.2f}s   same text as frontend: "
+          f"{sum(a.strip() == b.strip() for a, b in zip(front, back))}/{len(docs)}")
+    print(f"shared, in-process:          {t_serial:6.2f}s")
+    print(f"shared, {args.workers} workers:            {t_pool:6.2f}s   "
+          f"in-process == pooled: {sum(a == b for a, b in zip(serial, pooled))}/{len(docs)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Prompt token budgeting: tokens sent for a long synthetic resume + JD
+before/after services.prompt_budget, and how many JD-relevant sections
+survive the cut.
+
+    python benchmarks/bench_prompt_budget.py [--budget 3000] [--pages 8]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "Frontend"))
+from services.prompt_budget import fit_pair, split_sections
+from services.tokens import count_tokens
+
+JD_SKILLS = ["python", "sql", "spark", "airflow", "aws", "kafka", "dbt", "snowflake"]
+OTHER = ["photoshop", "illustrator", "negotiation", "retail", "cooking", "piano", "sales", "painting"]
+FILLER = "Worked with the team on day to day tasks and delivered results on schedule."
+
+
+def resume(pages: int, rng: random.Random) -> str:
+    parts = ["SUMMARY\nData engineer with 8 years of experience."]
+    for i in range(pages * 3):
+        relevant = i % 4 == 0
+        pool = JD_SKILLS if relevant else OTHER
+        bullets = [f"- Built {rng.choice(pool)} and {rng.choice(pool)} solutions. {FILLER}" for _ in range(12)]
+        parts.append(f"EXPERIENCE {i}\n" + "\n".join(bullets))
+    parts.append("SKILLS\n" + ", ".join(JD_SKILLS[:4] + OTHER[:4]))
+    return "\n\n".join(parts)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--budget", type=int, default=3000)
+    ap.add_argument("--pages", type=int, default=8)
+    args = ap.parse_args()
+    rng = random.Random(0)
+    jd = "REQUIREMENTS\n" + "\n".join(f"- Strong {s} experience" for s in JD_SKILLS)
+    text = resume(args.pages, rng)
+    model = "gpt-4o-mini"
+
+    t = time.perf_counter()
+    res_out, jd_out, reports = fit_pair(text, jd, model, budget=args.budget)
+    ms = 1000 * (time.perf_counter() - t)
+    for r in reports:
+        print(r)
+    relevant = [s for s in split_sections(text) if any(k in s for k in JD_SKILLS[:3])]
+    kept = sum(s in res_out for s in relevant)
+    print(f"JD-relevant sections kept: {kept}/{len(relevant)}; budgeting took {ms:.1f} ms")
+    assert count_tokens(res_out, model) + count_tokens(jd_out, model) <= args.budget
+
+if __name__ == "__main__":
+    main()
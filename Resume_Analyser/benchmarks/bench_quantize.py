@@ -0,0 +1,76 @@
+"""
+Memory and accuracy of shared.quantize (float16 / int8) against float32
+for the semantic_match decision: a JD skill is "matched" when its best
+cosine against the resume chunks reaches the threshold (slider 0.60-0.90).
+
+    python benchmarks/bench_quantize.py [--vectors emb.npy] [--dims 1536 384] [--trials 200]
+
+Synthetic vectors have their best-match cosines spread over 0.5-0.97 so
+many decisions sit near the thresholds; pass a saved (n, dim) embedding
+matrix to use real vectors (first half = JD skills, second half = resume).
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.quantize import PRECISIONS, quantize
+
+THRESHOLDS = np.round(np.arange(0.60, 0.901, 0.01), 2)
+
+
+def unit(x):
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+def synthetic_match(rng, dim, n_jd=30, n_chunks=40):
+    jd = unit(rng.standard_normal((n_jd, dim)).astype(np.float32))
+    noise = unit(rng.standard_normal((n_chunks, dim)).astype(np.float32))
+    c = rng.uniform(0.5, 0.97, size=(n_chunks, 1)).astype(np.float32)
+    anchors = jd[rng.integers(0, n_jd, n_chunks)]
+    # chunk = c * anchor + sqrt(1 - c^2) * (noise orthogonalised against anchor)
+    noise = unit(noise - (noise * anchors).sum(1, keepdims=True) * anchors)
+    return jd, c * anchors + np.sqrt(1 - c ** 2) * noise
+
+def run(pairs, dim):
+    print(f"\n{dim}-d, {len(pairs)} resume/JD pairs")
+    ref = [(rs @ jd.T).max(axis=0) for jd, rs in pairs]
+    ref_all = np.concatenate(ref)
+    for precision in PRECISIONS:
+        best, nbytes, dt = [], 0, 0.0
+        for jd, rs in pairs:
+            q = quantize(rs, precision)
+            t = time.perf_counter()
+            best.append(q.dot(jd).max(axis=1))
+            dt += time.perf_counter() - t
+            nbytes += q.nbytes
+        best = np.concatenate(best)
+        err = np.abs(best - ref_all)
+        flips = [(np.sum((best >= th) != (ref_all >= th)), th) for th in THRESHOLDS]
+        at_default = dict((th, f) for f, th in flips)[0.78]
+        per_vec = nbytes / sum(len(rs) for _, rs in pairs)
+        print(f"{precision:8s} {per_vec:7.0f} B/vector ({100 * per_vec / (4 * dim):5.1f}% of float32)  "
+              f"|dcos| mean {err.mean():.1e} max {err.max():.1e}  "
+              f"flips @0.78: {at_default}/{len(ref_all)}  worst threshold: {max(flips)[0]} @ {max(flips)[1]:.2f}  "
+              f"sim {1e6 * dt / len(pairs):.0f} us/pair")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vectors")
+    ap.add_argument("--dims", type=int, nargs="+", default=[1536, 384])
+    ap.add_argument("--trials", type=int, default=200)
+    args = ap.parse_args()
+
+    if args.vectors:
+        x = unit(np.load(args.vectors).astype(np.float32))
+        half = len(x) // 2
+        run([(x[:half], x[half:])], x.shape[1])
+        return
+    rng = np.random.default_rng(0)
+    for dim in args.dims:
+        run([synthetic_match(rng, dim) for _ in range(args.trials)], dim)
+
+if __name__ == "__main__":
+    main()
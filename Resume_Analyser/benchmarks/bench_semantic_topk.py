@@ -0,0 +1,59 @@
+"""
+Semantic match kernel: full skills x phrases matrix + per-row argmax (the old
+semantic_match) vs the blocked running top-k of Quantized.top_k, on random
+unit vectors. Reports time, peak memory of the scoring step and agreement.
+
+    python benchmarks/bench_semantic_topk.py [--skills 60] [--phrases 100000] [--dim 384] [--k 5]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from shared.quantize import quantize
+
+
+def unit(rng, n, dim):
+    x = rng.standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def measure(fn):
+    tracemalloc.start()
+    t = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - t
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, elapsed, peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--skills", type=int, default=60)
+    ap.add_argument("--phrases", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--precision", default="int8")
+    args = ap.parse_args()
+    rng = np.random.default_rng(0)
+    jd, phrases = unit(rng, args.skills, args.dim), quantize(unit(rng, args.phrases, args.dim), args.precision)
+
+    def full():
+        sims = phrases.dot(jd)
+        return np.array([int(np.argmax(sims[i])) for i in range(len(jd))])
+
+    best, t_full, m_full = measure(full)
+    (scores, idx), t_top, m_top = measure(lambda: phrases.top_k(jd, args.k))
+    print(f"{args.skills} skills x {args.phrases:,} phrases, dim {args.dim}, {args.precision}")
+    print(f"full matrix + argmax: {t_full * 1000:7.1f} ms, peak {m_full / 1e6:7.1f} MB")
+    print(f"blocked top-{args.k}:        {t_top * 1000:7.1f} ms, peak {m_top / 1e6:7.1f} MB")
+    print(f"best match agrees: {np.mean(idx[:, 0] == best):.3f}")
+
+if __name__ == "__main__":
+    main()
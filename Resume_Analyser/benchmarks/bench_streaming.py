@@ -0,0 +1,43 @@
+"""
+Perceived latency of the AI suggestions: blocking generate_suggestions vs
+stream_suggestions (time to first token), against the local mock OpenAI
+server streaming one word every --token-delay seconds.
+
+    python benchmarks/bench_streaming.py [--latency 0.5] [--token-delay 0.05]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "Frontend"))
+from services.mock_openai_server import MockOpenAIServer
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--latency", type=float, default=0.5, help="seconds before the first token")
+    ap.add_argument("--token-delay", type=float, default=0.05)
+    args = ap.parse_args()
+
+    with MockOpenAIServer(latency=args.latency, token_delay=args.token_delay) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "mock")
+        from services.ai import generate_suggestions, stream_suggestions
+
+        inputs = ("Data engineer, Python and SQL.", "Need Spark, Airflow, AWS.", ["spark", "airflow"], ["python"])
+        t = time.perf_counter()
+        blocking = generate_suggestions(*inputs)
+        blocking_s = time.perf_counter() - t
+
+        stream = stream_suggestions(*inputs)
+        deltas = list(stream)
+        assert stream.text == blocking, "streamed text differs from the blocking reply"
+        print(f"blocking:  first text after {blocking_s:5.2f}s")
+        print(f"streaming: first token after {stream.ttft_s:5.2f}s, complete after {stream.total_s:5.2f}s "
+              f"({len(deltas)} deltas)")
+
+if __name__ == "__main__":
+    main()
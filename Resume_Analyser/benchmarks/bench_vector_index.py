@@ -0,0 +1,81 @@
+"""
+Recall / latency of shared.vector_index (IVF) against its exact brute-force
+baseline.
+
+    python benchmarks/bench_vector_index.py [--vectors emb.npy] [--n 100000] [--precision int8] [--k 10]
+
+Without --vectors a clustered synthetic corpus of MiniLM-sized (384-d) unit
+vectors is used; pass a saved (n, dim) embedding matrix for real numbers.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.vector_index import VectorIndex
+
+
+def synthetic_corpus(n, dim, noise, clusters=500, seed=0):
+    centers = np.random.default_rng(0).standard_normal((clusters, dim)).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    x = centers[rng.integers(0, clusters, n)] + noise * rng.standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+def timed(fn, *args, **kwargs):
+    t = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - t
+
+def recall(approx, exact):
+    hits = sum(len({i for i, _ in a} & {i for i, _ in e}) for a, e in zip(approx, exact))
+    return hits / max(1, sum(len(e) for e in exact))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vectors")
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--precision", default="float16", choices=["float16", "int8"])
+    ap.add_argument("--noise", type=float, default=2.5, help="synthetic spread around cluster centres")
+    args = ap.parse_args()
+
+    x = np.load(args.vectors).astype(np.float32) if args.vectors else synthetic_corpus(args.n, args.dim, args.noise)
+    n, dim = x.shape
+    held_out = np.random.default_rng(1).choice(n, size=min(args.queries, n // 10), replace=False)
+    # fresh draws from the same distribution, not perturbed copies of stored rows
+    queries = x[held_out] if args.vectors else synthetic_corpus(len(held_out), dim, args.noise, seed=2)
+
+    with tempfile.TemporaryDirectory() as d:
+        index = VectorIndex(d, dim, precision=args.precision)
+        _, build_s = timed(index.add, [str(i) for i in range(n)], x)
+        st = index.stats()
+        print(f"{n} x {dim}: build {build_s:.1f}s, nlist={st['nlist']}, "
+              f"{n * st['bytes'] / st['capacity'] / 2**20:.0f} MiB {args.precision} vs {n * dim * 4 / 2**20:.0f} MiB float32")
+
+        exact, exact_s = timed(index.exact_search, queries, args.k)
+        print(f"exact        {1000 * exact_s / len(queries):7.2f} ms/query")
+        for nprobe in (1, 4, 8, 16, 32, 64):
+            if nprobe > st["nlist"]:
+                break
+            approx, s = timed(index.search, queries, args.k, nprobe=nprobe)
+            print(f"nprobe={nprobe:<4d} {1000 * s / len(queries):7.2f} ms/query  "
+                  f"recall@{args.k}={recall(approx, exact):.3f}  speedup={exact_s / s:5.1f}x")
+
+        # incremental updates: deleted ids must vanish from results, reinserts come back
+        gone = [str(i) for i in held_out]
+        _, s = timed(index.remove, gone)
+        found = {i for r in index.search(queries, args.k) for i, _ in r}
+        assert not found.intersection(gone)
+        print(f"delete {len(gone)} vectors: {1000 * s:.1f} ms")
+        _, s = timed(index.add, gone, x[held_out])
+        assert len(index) == n
+        print(f"reinsert {len(gone)} vectors: {1000 * s:.1f} ms, size {len(index)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Inverted index over a resume corpus for JD -> top-K candidate search.
+
+Resumes are indexed by the terms shared.keywords.extract_keywords_blocks
+produces, and ranked with the same JD-frequency-weighted coverage score as
+match_resume_with_jd:
+
+    score(resume) = 100 * sum(jd_freq[t] for JD terms t in resume) / sum(jd_freq)
+
+Only posting lists of the JD's terms are touched, so a query costs
+O(postings of JD terms) instead of a scan over every resume.
+
+On-disk layout (one directory):
+  meta.json              doc ids (position = internal doc number), segments
+  seg-NNNN.keys.npy      sorted uint64 term keys (first 8 bytes of blake2b(term))
+  seg-NNNN.offsets.npy   uint32 byte offset of each key's posting list (+ end)
+  seg-NNNN.post          posting lists: delta-encoded doc numbers as LEB128 varints
+
+All three segment files are memory-mapped, never loaded: a query hashes its
+JD terms and finds them with np.searchsorted, so a segment costs no Python
+objects however large its lexicon. Terms whose keys collide (about one pair
+in 10^7 segments of a million terms) share a merged posting list.
+
+The corpus is written in segments of segment_size resumes so building
+200k resumes never holds more than one segment's postings in memory.
+
+    python -m shared.candidate_index build <resume_dir> <index_dir>
+    python -m shared.candidate_index search <index_dir> <jd.txt> [-k 20]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from collections import defaultdict
+from itertools import chain
+from typing import Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+
+from shared.jd_profile import JDProfile
+from shared.keywords import extract_keywords_blocks
+
+# meta.json "lexicon" of indexes this module reads; older ones must be rebuilt
+LEXICON = "blake2b-64"
+
+
+# ---- varint codec (vectorized) ----
+def _varint_encode(v: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    uint64 values -> (LEB128 bytes, bytes used per value).
+    """
+    v = np.asarray(v, dtype=np.uint64)
+    nbytes = np.ones(len(v), dtype=np.int64)
+    for k in (1, 2, 3, 4):
+        nbytes += v >= (np.uint64(1) << np.uint64(7 * k))
+    starts = np.concatenate(([0], np.cumsum(nbytes)[:-1])).astype(np.int64)
+    out = np.zeros(int(nbytes.sum()), dtype=np.uint8)
+    for k in range(5):
+        m = nbytes > k
+        if not m.any():
+            break
+        byte = (v[m] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (nbytes[m] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[m] + k] = (byte | more).astype(np.uint8)
+    return out, nbytes
+
+def _varint_decode(b: np.ndarray) -> np.ndarray:
+    b = np.asarray(b, dtype=np.uint8)
+    if not len(b):
+        return np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(b < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shift = (np.arange(len(b)) - np.repeat(starts, ends - starts + 1)) * 7
+    return np.add.reduceat((b & 0x7F).astype(np.int64) << shift, starts)
+
+
+def term_keys(terms: List[str]) -> np.ndarray:
+    """
+    uint64 lexicon key of each term.
+    """
+    digests = b"".join(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest() for t in terms)
+    return np.frombuffer(digests, dtype="<u8").astype(np.uint64)
+
+def _map(path: str, dtype) -> np.ndarray:
+    # np.load can't memory-map an empty array
+    arr = np.load(path, mmap_mode="r")
+    return arr if arr.size else np.zeros(0, dtype=dtype)
+
+
+class _Segment:
+    def __init__(self, directory: str, name: str):
+        self.keys = _map(os.path.join(directory, f"{name}.keys.npy"), np.uint64)
+        self.offsets = _map(os.path.join(directory, f"{name}.offsets.npy"), np.uint32)
+        path = os.path.join(directory, f"{name}.post")
+        size = os.path.getsize(path)
+        self.post = np.memmap(path, dtype=np.uint8, mode="r") if size else np.zeros(0, dtype=np.uint8)
+
+    def weighted_postings(self, weights: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (doc numbers, weights) for every posting of the given terms, decoded
+        in one vectorized pass over the concatenated posting lists.
+        """
+        if not weights or not len(self.keys):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        keys = term_keys(list(weights))
+        ids = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = self.keys[ids] == keys
+        if not found.any():
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        ids = ids[found]
+        w = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))[found]
+        starts, ends = self.offsets[ids].astype(np.int64), self.offsets[ids + 1].astype(np.int64)
+        buf = np.concatenate([self.post[s:e] for s, e in zip(starts, ends)])
+        raw = _varint_decode(buf)
+        # postings per list = terminal (high bit clear) bytes within its byte range
+        byte_starts = np.concatenate(([0], np.cumsum(ends - starts)[:-1]))
+        counts = np.add.reduceat((buf < 0x80).astype(np.int64), byte_starts)
+        first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        total = np.cumsum(raw)
+        docs = total - np.repeat(total[first] - raw[first], counts)
+        return docs, np.repeat(w, counts)
+
+
+class IndexWriter:
+    def __init__(self, directory: str, segment_size: int = 20_000, max_n: int = 2):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_size = max(1, segment_size)
+        self.max_n = max_n
+        self.doc_ids: List[str] = []
+        self.segments: List[str] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._in_segment = 0
+
+    def add(self, doc_id: str, text: str):
+        terms, _ = extract_keywords_blocks(text, max_n=self.max_n)
+        num = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        for t in terms:
+            self._postings[t].append(num)
+        self._in_segment += 1
+        if self._in_segment >= self.segment_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._in_segment:
+            return
+        name = f"seg-{len(self.segments):04d}"
+        terms = list(self._postings)
+        keys = term_keys(terms)
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        lists = [self._postings[terms[i]] for i in order.tolist()]
+        dup = np.flatnonzero(keys[1:] == keys[:-1]) + 1
+        for i in dup[::-1].tolist():
+            # colliding keys: one merged, sorted list
+            lists[i - 1] = sorted(set(lists[i - 1]).union(lists.pop(i)))
+        keys = np.delete(keys, dup)
+        # Encode the whole segment in one pass: deltas restart at each term's list
+        lens = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+        flat = np.fromiter(chain.from_iterable(lists), dtype=np.uint64, count=int(lens.sum()))
+        first = np.concatenate(([0], np.cumsum(lens)[:-1])).astype(np.int64)
+        deltas = np.diff(flat, prepend=np.uint64(0))
+        deltas[first] = flat[first]
+        data, nbytes = _varint_encode(deltas)
+        byte_cum = np.concatenate(([0], np.cumsum(nbytes)))
+        if byte_cum[-1] > np.iinfo(np.uint32).max:
+            raise ValueError(f"{name}: posting lists exceed 4 GiB; use a smaller segment_size")
+        offsets = byte_cum[np.concatenate((first, [len(flat)]))].astype(np.uint32)
+        data.tofile(os.path.join(self.directory, f"{name}.post"))
+        np.save(os.path.join(self.directory, f"{name}.offsets.npy"), offsets)
+        np.save(os.path.join(self.directory, f"{name}.keys.npy"), keys)
+        self.segments.append(name)
+        self._postings = defaultdict(list)
+        self._in_segment = 0
+
+    def close(self):
+        self._flush()
+        tmp = os.path.join(self.directory, "meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"doc_ids": self.doc_ids, "segments": self.segments, "max_n": self.max_n,
+                       "lexicon": LEXICON}, f)
+        os.replace(tmp, os.path.join(self.directory, "meta.json"))
+
+
+class CandidateIndex:
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("lexicon") != LEXICON:
+            raise ValueError(f"{directory}: index built by an older version; rebuild it with "
+                             f"`python -m shared.candidate_index build`")
+        self.directory = directory
+        self.doc_ids: List[str] = meta["doc_ids"]
+        self.max_n = meta.get("max_n", 2)
+        self._segments = [_Segment(directory, name) for name in meta["segments"]]
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @classmethod
+    def build(cls, docs: Iterable[Tuple[str, str]], directory: str, segment_size: int = 20_000) -> "CandidateIndex":
+        writer = IndexWriter(directory, segment_size)
+        for doc_id, text in docs:
+            writer.add(doc_id, text)
+        writer.close()
+        return cls(directory)
+
+    def scores(self, jd: Union[str, JDProfile]) -> np.ndarray:
+        """
+        Coverage score (0-100, unrounded) of every indexed resume for the JD.
+        """
+        profile = jd if isinstance(jd, JDProfile) else JDProfile.build(jd)
+        covered = np.zeros(len(self.doc_ids), dtype=np.float64)
+        for seg in self._segments:
+            docs, weights = seg.weighted_postings(profile.freq)
+            if len(docs):
+                covered += np.bincount(docs, weights=weights, minlength=len(covered))
+        return 100.0 * covered / profile.total_weight
+
+    def search(self, jd: Union[str, JDProfile], k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Top-k (doc_id, score) by JD-frequency-weighted coverage, best first;
+        resumes sharing no term with the JD are left out.
+        """
+        scores = self.scores(jd)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [(self.doc_ids[i], round(float(scores[i]), 1)) for i in top if scores[i] > 0]
+
+
+# ---- CLI ----
+def _read_document(path: str) -> str:
+    name = path.lower()
+    if name.endswith(".pdf"):
+        # same text (and page cap) the backend extracts from an upload
+        from shared.pdf_extract import extract_pdf
+        with open(path, "rb") as f:
+            return extract_pdf(f.read())
+    if name.endswith(".docx"):
+        import docx2txt
+        return docx2txt.process(path) or ""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+def _iter_corpus(root: str):
+    for dirpath, _, files in os.walk(root):
+        for fn in sorted(files):
+            if fn.lower().endswith((".txt", ".pdf", ".docx")):
+                path = os.path.join(dirpath, fn)
+                try:
+                    yield os.path.relpath(path, root), _read_document(path)
+                except Exception as e:
+                    print(f"skip {path}: {e}", file=sys.stderr)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m shared.candidate_index")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="index a directory of resumes (.txt/.pdf/.docx)")
+    b.add_argument("corpus")
+    b.add_argument("index")
+    b.add_argument("--segment-size", type=int, default=20_000)
+    s = sub.add_parser("search", help="top-K resumes for a JD text file")
+    s.add_argument("index")
+    s.add_argument("jd")
+    s.add_argument("-k", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "build":
+        idx = CandidateIndex.build(_iter_corpus(args.corpus), args.index, args.segment_size)
+        print(f"indexed {len(idx)} resumes into {args.index}")
+    else:
+        with open(args.jd, "r", encoding="utf-8", errors="ignore") as f:
+            jd_text = f.read()
+        for doc_id, score in CandidateIndex(args.index).search(jd_text, args.k):
+            print(f"{score:6.1f}  {doc_id}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,516 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from shared.quantize import PRECISIONS, quantize_int8
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, the directory is used as given
+    fcntl = None
+
+EncodeFn = Callable[[List[str]], np.ndarray]
+
+def normalize_text(text: str) -> str:
+    return " ".join((text or "").split())
+
+def text_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+def claim_directory(directory: str) -> Tuple[str, Optional[object]]:
+    """
+    (directory/proc-N, lock file): the first proc-N no live process holds,
+    locked for as long as the returned file stays open. A restarted worker
+    takes a free proc-N back with its vectors.
+    """
+    if fcntl is None:
+        return directory, None
+    n = 0
+    while True:
+        sub = os.path.join(directory, f"proc-{n}")
+        os.makedirs(sub, exist_ok=True)
+        lock = open(os.path.join(sub, ".lock"), "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return sub, lock
+        except OSError:
+            lock.close()
+            n += 1
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed by sha256(model name + normalized text).
+
+    - memory tier: small LRU of recently used vectors
+    - disk tier: memory-mapped float32 matrix (<model>.f32) plus an index
+      mapping key -> row, kept in LRU order and evicted once it holds
+      max_entries rows
+
+    The index is persisted as a JSON snapshot (<model>.index.json) plus an
+    append-only log (<model>.index.log, one "key row" line per stored
+    vector). A miss only appends to the log. Once the log outgrows the
+    snapshot it is rotated and the snapshot is rewritten on a background
+    thread. close() (run at exit) and opening the cache fold the log into
+    the snapshot.
+
+    The index lives in this process's memory, so the files can have only
+    one writer: each cache claims its own proc-N subdirectory of directory
+    under an exclusive flock (claim_directory). Processes sharing a
+    directory (uvicorn workers) therefore never overwrite each other's
+    rows, at the price of each keeping its own vectors.
+    """
+    _COMPACT_MIN_LINES = 4096
+
+    def __init__(self, model_name: str, dim: int, directory: Optional[str] = None,
+                 max_entries: int = 100_000, memory_entries: int = 4096):
+        self.model_name = model_name
+        self.dim = dim
+        self.max_entries = max(1, max_entries)
+        self.memory_entries = max(0, memory_entries)
+        self.hits = self.misses = 0
+        self._lock = threading.RLock()
+        self._mem: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._free: List[int] = []
+        self._matrix = None
+        self._capacity = 0
+        self._log = None
+        self._log_lines = 0
+        self._compactor: Optional[threading.Thread] = None
+        self._dir_lock = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            directory, self._dir_lock = claim_directory(directory)
+            slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+            self._data_path = os.path.join(directory, f"{slug}.f32")
+            self._index_path = os.path.join(directory, f"{slug}.index.json")
+            self._log_path = os.path.join(directory, f"{slug}.index.log")
+            self._open()
+            atexit.register(self.close)
+
+    # ---- disk tier ----
+    def _open(self):
+        meta = None
+        if os.path.exists(self._index_path) and os.path.exists(self._data_path):
+            try:
+                with open(self._index_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except Exception:
+                meta = None
+        valid = bool(meta) and meta.get("dim") == self.dim and meta.get("model") == self.model_name
+        if valid:
+            self._capacity = os.path.getsize(self._data_path) // (self.dim * 4)
+            self._index = OrderedDict((k, int(v)) for k, v in meta["rows"] if int(v) < self._capacity)
+            # a crash may leave a rotated log whose snapshot was never written
+            replayed = sum(self._replay(p) for p in (self._log_path + ".old", self._log_path))
+        else:
+            self._index, self._capacity, replayed = OrderedDict(), 0, 0
+        if not self._capacity:
+            self._index = OrderedDict()
+            self._resize(min(1024, self.max_entries))
+        else:
+            self._matrix = np.memmap(self._data_path, dtype=np.float32, mode="r+",
+                                     shape=(self._capacity, self.dim))
+        used = set(self._index.values())
+        self._free = [i for i in range(self._capacity - 1, -1, -1) if i not in used]
+        if replayed or not valid or not os.path.exists(self._log_path):
+            # startup, not the request path: fold everything into a fresh snapshot
+            self._write_snapshot(list(self._index.items()), self._capacity)
+            for path in (self._log_path + ".old", self._log_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        self._log = open(self._log_path, "a", encoding="utf-8")
+
+    def _replay(self, path: str) -> int:
+        if not os.path.exists(path):
+            return 0
+        owner = {row: key for key, row in self._index.items()}
+        n = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 2 or not parts[1].isdigit():
+                    continue  # torn last line
+                key, row = parts[0], int(parts[1])
+                if row >= self._capacity:
+                    continue
+                prev = owner.get(row)
+                if prev is not None and prev != key:
+                    self._index.pop(prev, None)
+                old_row = self._index.pop(key, None)
+                if old_row is not None and old_row != row:
+                    owner.pop(old_row, None)
+                self._index[key] = row
+                owner[row] = key
+                n += 1
+        return n
+
+    def _resize(self, capacity: int):
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        mode = "r+" if os.path.exists(self._data_path) and self._capacity else "w+"
+        with open(self._data_path, "r+b" if mode == "r+" else "wb") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._free = list(range(capacity - 1, self._capacity - 1, -1)) + self._free
+        self._capacity = capacity
+        self._matrix = np.memmap(self._data_path, dtype=np.float32, mode="r+",
+                                 shape=(capacity, self.dim))
+
+    def _slot(self) -> int:
+        if not self._free and self._capacity < self.max_entries:
+            self._resize(min(self._capacity * 2, self.max_entries))
+        if self._free:
+            return self._free.pop()
+        # full: evict least recently used row (the log line for its new key records that)
+        _, slot = self._index.popitem(last=False)
+        return slot
+
+    def _write_snapshot(self, rows: List, capacity: int):
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model_name, "dim": self.dim, "capacity": capacity, "rows": rows}, f)
+        os.replace(tmp, self._index_path)
+
+    def _append_log(self, entries: List):
+        # caller holds the lock; one short write per batch of misses
+        self._log.write("".join(f"{k} {row}\n" for k, row in entries))
+        self._log.flush()
+        self._log_lines += len(entries)
+        if self._log_lines > max(self._COMPACT_MIN_LINES, len(self._index)) and self._compactor is None:
+            self._rotate_log()
+            rows, capacity, matrix = list(self._index.items()), self._capacity, self._matrix
+            self._compactor = threading.Thread(target=self._compact, args=(rows, capacity, matrix),
+                                               name="embed-cache-compact", daemon=True)
+            self._compactor.start()
+
+    def _rotate_log(self):
+        self._log.close()
+        os.replace(self._log_path, self._log_path + ".old")
+        self._log = open(self._log_path, "a", encoding="utf-8")
+        self._log_lines = 0
+
+    def _compact(self, rows: List, capacity: int, matrix):
+        # background: rows is the index as of the rotation, the new log holds everything after
+        try:
+            matrix.flush()
+            self._write_snapshot(rows, capacity)
+            os.remove(self._log_path + ".old")
+        except OSError:
+            pass  # .old stays and is replayed on the next open
+        finally:
+            with self._lock:
+                self._compactor = None
+
+    def close(self):
+        """
+        Flush vectors and fold the log into the snapshot (also run at exit).
+        """
+        while True:
+            with self._lock:
+                compactor = self._compactor
+                if compactor is None:
+                    if self._log is None:
+                        return
+                    self._matrix.flush()
+                    self._write_snapshot(list(self._index.items()), self._capacity)
+                    self._log.close()
+                    for path in (self._log_path + ".old", self._log_path):
+                        if os.path.exists(path):
+                            os.remove(path)
+                    self._log = open(self._log_path, "a", encoding="utf-8")
+                    self._log_lines = 0
+                    return
+            # a snapshot written after ours would be older than the index
+            compactor.join()
+
+    # ---- memory tier ----
+    def _remember(self, key: str, vec: np.ndarray):
+        if not self.memory_entries:
+            return
+        self._mem[key] = vec
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.memory_entries:
+            self._mem.popitem(last=False)
+
+    def _lookup(self, key: str) -> Optional[np.ndarray]:
+        vec = self._mem.get(key)
+        if vec is not None:
+            self._mem.move_to_end(key)
+            if key in self._index:
+                self._index.move_to_end(key)
+            return vec
+        if self._matrix is not None and key in self._index:
+            self._index.move_to_end(key)
+            vec = np.array(self._matrix[self._index[key]])
+            self._remember(key, vec)
+            return vec
+        return None
+
+    # ---- public API ----
+    def encode(self, texts: List[str], encode_fn: EncodeFn) -> np.ndarray:
+        """
+        Return one vector per text, calling encode_fn once with only the
+        texts (normalized, de-duplicated) that are not cached yet.
+        """
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if not texts:
+            return out
+        keys = [text_key(self.model_name, t) for t in texts]
+        pending: Dict[str, List[int]] = OrderedDict()
+        with self._lock:
+            for i, k in enumerate(keys):
+                vec = self._lookup(k)
+                if vec is None:
+                    pending.setdefault(k, []).append(i)
+                else:
+                    out[i] = vec
+            self.hits += len(texts) - sum(len(v) for v in pending.values())
+            self.misses += sum(len(v) for v in pending.values())
+        if not pending:
+            return out
+
+        miss_texts = [normalize_text(texts[rows[0]]) for rows in pending.values()]
+        vecs = np.asarray(encode_fn(miss_texts), dtype=np.float32).reshape(len(miss_texts), self.dim)
+        with self._lock:
+            stored = []
+            for (k, rows), vec in zip(pending.items(), vecs):
+                out[rows] = vec
+                self._remember(k, vec)
+                if self._matrix is not None:
+                    slot = self._index.pop(k, None)
+                    if slot is None:
+                        slot = self._slot()
+                    self._matrix[slot] = vec
+                    self._index[k] = slot
+                    stored.append((k, slot))
+            if stored:
+                # vectors reach the file through the page cache; flushed on compaction / close
+                self._append_log(stored)
+        return out
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "memory_entries": len(self._mem),
+            "disk_entries": len(self._index),
+            "disk_capacity": self._capacity,
+        }
+
+
+class SQLiteEmbeddingCache:
+    """
+    Per-string embedding cache in a single SQLite file, safe to share across
+    threads, Streamlit sessions and processes (WAL journal, one connection
+    per thread). Same keys and encode() contract as EmbeddingCache.
+
+    Rows are keyed by sha256(model + normalized text) and stored in
+    precision: float32 or float16 bytes, or int8 codes followed by their
+    float32 scale (shared.quantize). They are decoded to float32 on read,
+    and the blob length tells the format, so changing precision keeps
+    existing rows usable. Fresh vectors go through the same round trip
+    before they are returned, so a text gets the same vector whether it was
+    cached or not. Once a model holds more than max_entries rows the oldest
+    are deleted. Hit/miss
+    totals are persisted per model next to the vectors; they are counted in
+    memory and written with the next insert, at most every
+    _COUNTER_FLUSH_S otherwise and at exit, so a pure cache hit never takes
+    the SQLite write lock.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS embeddings (
+            key TEXT PRIMARY KEY, model TEXT NOT NULL, vec BLOB NOT NULL, created REAL NOT NULL);
+        CREATE INDEX IF NOT EXISTS embeddings_model_created ON embeddings (model, created);
+        CREATE TABLE IF NOT EXISTS counters (
+            model TEXT PRIMARY KEY, hits INTEGER NOT NULL DEFAULT 0, misses INTEGER NOT NULL DEFAULT 0);
+    """
+    _BATCH = 500  # keys per SELECT ... IN (...)
+    _COUNTER_FLUSH_S = 30.0
+
+    def __init__(self, path: str, model_name: str, dim: int,
+                 max_entries: int = 500_000, memory_entries: int = 4096, precision: str = "float32"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}, got {precision!r}")
+        self.path = path
+        self.model_name = model_name
+        self.dim = dim
+        self.precision = precision
+        self.max_entries = max(1, max_entries)
+        self.memory_entries = max(0, memory_entries)
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._mem: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._unsaved = [0, 0]  # hits, misses not yet in the counters table
+        self._counters_saved = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(self._SCHEMA)
+        atexit.register(self.flush_counters)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key: str, vec: np.ndarray):
+        if not self.memory_entries:
+            return
+        with self._lock:
+            self._mem[key] = vec
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.memory_entries:
+                self._mem.popitem(last=False)
+
+    # ---- stored form ----
+    def _to_blobs(self, vecs: np.ndarray) -> List[bytes]:
+        if self.precision == "int8":
+            codes, scales = quantize_int8(vecs)
+            return [c.tobytes() + s.tobytes() for c, s in zip(codes, scales)]
+        return [v.tobytes() for v in vecs.astype(self.precision)]
+
+    def _from_blob(self, blob: bytes) -> Optional[np.ndarray]:
+        n = len(blob)
+        if n == self.dim * 4:
+            return np.frombuffer(blob, dtype=np.float32)
+        if n == self.dim * 2:
+            return np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+        if n == self.dim + 4:
+            codes = np.frombuffer(blob, dtype=np.int8, count=self.dim)
+            return codes.astype(np.float32) * np.frombuffer(blob, dtype=np.float32, offset=self.dim)[0]
+        return None
+
+    def _select(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found, conn = {}, self._conn()
+        for s in range(0, len(keys), self._BATCH):
+            part = keys[s:s + self._BATCH]
+            rows = conn.execute(f"SELECT key, vec FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part)
+            for key, blob in rows:
+                vec = self._from_blob(blob)
+                if vec is not None:
+                    found[key] = vec
+        return found
+
+    def _insert(self, items: Dict[str, bytes]):
+        conn, now = self._conn(), time.time()
+        counts = self._take_counts()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._save_counts(conn, *counts)
+            conn.executemany("INSERT OR REPLACE INTO embeddings (key, model, vec, created) VALUES (?, ?, ?, ?)",
+                             [(k, self.model_name, blob, now) for k, blob in items.items()])
+            (count,) = conn.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model_name,)).fetchone()
+            if count > self.max_entries:
+                conn.execute("DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings WHERE model = ? "
+                             "ORDER BY created LIMIT ?)", (self.model_name, count - self.max_entries))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            self._count(*counts, session=False)
+            raise
+
+    def _count(self, hits: int, misses: int, session: bool = True):
+        with self._lock:
+            if session:
+                self.hits += hits
+                self.misses += misses
+            self._unsaved[0] += hits
+            self._unsaved[1] += misses
+
+    def _take_counts(self) -> Tuple[int, int]:
+        with self._lock:
+            hits, misses = self._unsaved
+            self._unsaved = [0, 0]
+            self._counters_saved = time.monotonic()
+        return hits, misses
+
+    def _save_counts(self, conn: sqlite3.Connection, hits: int, misses: int):
+        if hits or misses:
+            conn.execute(
+                "INSERT INTO counters (model, hits, misses) VALUES (?, ?, ?) "
+                "ON CONFLICT(model) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses",
+                (self.model_name, hits, misses))
+
+    def flush_counters(self):
+        """
+        Write the hit/miss counts gathered since the last write (also run at exit).
+        """
+        counts = self._take_counts()
+        try:
+            self._save_counts(self._conn(), *counts)
+        except sqlite3.Error:
+            self._count(*counts, session=False)  # retried with the next write
+
+    def encode(self, texts: List[str], encode_fn: EncodeFn) -> np.ndarray:
+        """
+        Return one vector per text, calling encode_fn once with only the
+        texts (normalized, de-duplicated) that no process has cached yet.
+        """
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if not texts:
+            return out
+        keys = [text_key(self.model_name, t) for t in texts]
+        pending: Dict[str, List[int]] = OrderedDict()
+        with self._lock:
+            for i, k in enumerate(keys):
+                vec = self._mem.get(k)
+                if vec is None:
+                    pending.setdefault(k, []).append(i)
+                else:
+                    self._mem.move_to_end(k)
+                    out[i] = vec
+        for k, vec in self._select(list(pending)).items():
+            out[pending.pop(k)] = vec
+            self._remember(k, vec)
+        misses = sum(len(v) for v in pending.values())
+        self._count(len(texts) - misses, misses)
+        if not pending:
+            if time.monotonic() - self._counters_saved >= self._COUNTER_FLUSH_S:
+                self.flush_counters()
+            return out
+
+        miss_texts = [normalize_text(texts[rows[0]]) for rows in pending.values()]
+        vecs = np.asarray(encode_fn(miss_texts), dtype=np.float32).reshape(len(miss_texts), self.dim)
+        blobs = self._to_blobs(vecs)
+        for (k, rows), blob in zip(pending.items(), blobs):
+            vec = self._from_blob(blob)
+            out[rows] = vec
+            self._remember(k, vec)
+        self._insert(dict(zip(pending, blobs)))
+        return out
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        conn = self._conn()
+        (entries,) = conn.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model_name,)).fetchone()
+        row = conn.execute("SELECT hits, misses FROM counters WHERE model = ?", (self.model_name,)).fetchone()
+        all_hits, all_misses = row or (0, 0)
+        with self._lock:
+            all_hits, all_misses = all_hits + self._unsaved[0], all_misses + self._unsaved[1]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "memory_entries": len(self._mem),
+            "disk_entries": entries,
+            "total_hits": all_hits,
+            "total_misses": all_misses,
+            "total_hit_rate": round(all_hits / (all_hits + all_misses), 4) if all_hits + all_misses else 0.0,
+        }
@@ -0,0 +1,226 @@
+"""
+Precomputed job-description profiles.
+
+A JDProfile holds everything the matchers need from one JD: its term
+frequencies (the JD-frequency weights), total weight, skill bag and
+optionally its embedding. Build it once per JD and score any number of
+resumes against it; only the resume side is computed per match.
+
+analyzer names the term extractor the profile was built with:
+  "keywords"    - shared.keywords.extract_keywords_blocks (frontend matcher)
+  "noun_lemmas" - spaCy noun/proper-noun lemmas (backend /analyze)
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+
+from shared import taxonomy
+from shared.keywords import extract_keywords_blocks
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(" ".join((text or "").split()).encode("utf-8")).hexdigest()
+
+def profile_id(text: str, analyzer: str, fingerprint: Optional[str] = None) -> str:
+    """
+    Content id of a JD profile: analyzer, taxonomy fingerprint (skills and
+    normalization depend on it; default the current taxonomy) and JD text.
+    """
+    if fingerprint is None:
+        fingerprint = taxonomy.current().fingerprint
+    return f"{analyzer}-{fingerprint}-{text_hash(text)[:32]}"
+
+_PROFILE_ID = re.compile(r"^(keywords|noun_lemmas)-[0-9a-f]{8}-[0-9a-f]{32}$")
+
+def valid_profile_id(pid: str) -> bool:
+    # ids arrive from clients and name files on disk: nothing else may pass
+    return isinstance(pid, str) and _PROFILE_ID.match(pid) is not None
+
+
+@dataclass
+class JDProfile:
+    id: str
+    analyzer: str
+    freq: Counter
+    skills: Dict[str, int] = field(default_factory=dict)
+    embedding: Optional[np.ndarray] = None
+    embed_model: Optional[str] = None
+    terms: FrozenSet[str] = field(init=False)
+    total_weight: int = field(init=False)
+
+    def __post_init__(self):
+        self.terms = frozenset(self.freq)
+        self.total_weight = sum(self.freq.values()) or 1
+
+    @classmethod
+    def build(cls, jd_text: str, analyzer: str = "keywords", freq: Optional[Counter] = None,
+              embedding: Optional[np.ndarray] = None, embed_model: Optional[str] = None) -> "JDProfile":
+        """
+        freq defaults to extract_keywords_blocks(jd_text); pass it in for other analyzers.
+        """
+        tax = taxonomy.current()
+        if freq is None:
+            _, freq = extract_keywords_blocks(jd_text)
+        skills = dict(tax.matcher.count(jd_text or ""))
+        if embedding is not None:
+            embedding = np.asarray(embedding, dtype=np.float32)
+        return cls(profile_id(jd_text, analyzer, tax.fingerprint), analyzer, Counter(freq), skills,
+                   embedding, embed_model)
+
+    # ---- scoring (resume side only) ----
+    def score_terms(self, res_terms: Set[str]) -> Tuple[List[str], List[str], float]:
+        """
+        (matched, missing, score): JD terms present / absent in the resume,
+        high -> low JD frequency, and the % of JD weight covered.
+        """
+        jd_freq = self.freq
+        key = lambda k: (-jd_freq[k], k)
+        matched = sorted(self.terms.intersection(res_terms), key=key)
+        missing = sorted(self.terms.difference(res_terms), key=key)
+        covered_weight = sum(jd_freq[t] for t in matched)
+        return matched, missing, round(100 * covered_weight / self.total_weight, 1)
+
+    # ---- persistence ----
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "analyzer": self.analyzer,
+            "freq": dict(self.freq),
+            "skills": self.skills,
+            "embedding": None if self.embedding is None else self.embedding.tolist(),
+            "embed_model": self.embed_model,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "JDProfile":
+        emb = data.get("embedding")
+        return cls(data["id"], data["analyzer"], Counter(data["freq"]), data.get("skills", {}),
+                   None if emb is None else np.asarray(emb, dtype=np.float32), data.get("embed_model"))
+
+    def save(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "JDProfile":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+@lru_cache(maxsize=32)
+def _cached_profile(jd_text: str, fingerprint: str) -> JDProfile:
+    return JDProfile.build(jd_text)
+
+def cached_profile(jd_text: str) -> JDProfile:
+    """
+    The "keywords" profile of jd_text, memoized per process on the text and
+    the taxonomy fingerprint, so a taxonomy reload rebuilds it.
+    """
+    return _cached_profile(jd_text, taxonomy.current().fingerprint)
+
+
+class JDProfileStore:
+    """
+    In-memory LRU of profiles, backed by one JSON file per profile when a
+    directory is given. The directory keeps at most max_files profiles; past
+    that the least recently used files (by mtime, refreshed on load) go.
+
+    Ids that are not profile_id()s are never looked up, and a profile built
+    with another taxonomy than the current one is a miss: its skills and
+    terms are stale. With embed_model set, so is a profile embedded by
+    another model.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_entries: int = 1024,
+                 max_files: int = 10_000, embed_model: Optional[str] = None):
+        self.directory = directory
+        self.max_entries = max(1, max_entries)
+        self.max_files = max(1, max_files)
+        self.embed_model = embed_model
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, JDProfile]" = OrderedDict()
+        self._files = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._files = len(self._listing())
+
+    def _path(self, pid: str) -> str:
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def _listing(self) -> List[str]:
+        return [n for n in os.listdir(self.directory) if n.endswith(".json") and valid_profile_id(n[:-5])]
+
+    def _usable(self, prof: JDProfile) -> bool:
+        return self.embed_model is None or prof.embedding is None or prof.embed_model == self.embed_model
+
+    def get(self, pid: str) -> Optional[JDProfile]:
+        if not valid_profile_id(pid) or pid.split("-")[1] != taxonomy.current().fingerprint:
+            return None
+        with self._lock:
+            prof = self._items.get(pid)
+            if prof is not None:
+                self._items.move_to_end(pid)
+                return prof
+        if self.directory and os.path.exists(self._path(pid)):
+            try:
+                prof = JDProfile.load(self._path(pid))
+                os.utime(self._path(pid))
+            except (OSError, ValueError, KeyError):
+                return None
+            if prof.id != pid or not self._usable(prof):
+                return None
+            self._remember(prof)
+            return prof
+        return None
+
+    def put(self, prof: JDProfile):
+        if not valid_profile_id(prof.id):
+            raise ValueError(f"invalid JD profile id {prof.id!r}")
+        self._remember(prof)
+        if self.directory:
+            path = self._path(prof.id)
+            is_new = not os.path.exists(path)
+            prof.save(path)
+            if is_new:
+                with self._lock:
+                    self._files += 1
+                    full = self._files > self.max_files
+                if full:
+                    self._evict_files()
+
+    def _evict_files(self):
+        # trim to 90% so a full directory is not rescanned on every new profile
+        keep = max(1, int(self.max_files * 0.9))
+        entries = []
+        for name in self._listing():
+            try:
+                entries.append((os.path.getmtime(os.path.join(self.directory, name)), name))
+            except OSError:
+                pass
+        entries.sort()
+        removed = 0
+        for _, name in entries[:max(0, len(entries) - keep)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._files = len(entries) - removed
+
+    def _remember(self, prof: JDProfile):
+        with self._lock:
+            self._items[prof.id] = prof
+            self._items.move_to_end(prof.id)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
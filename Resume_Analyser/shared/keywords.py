@@ -0,0 +1,94 @@
+"""
+Keyword engine behind the frontend matcher (unigrams + n-grams with
+JD-frequency weighting). Free of Streamlit so the backend, indexers and
+benchmarks can import it.
+
+Each distinct whitespace chunk of the text is tokenized and normalized
+once per call; n-grams are zipped from the term list and counted by
+Counter in C.
+"""
+import re
+import string
+from collections import Counter
+from itertools import chain
+from typing import Dict, List, Optional, Set, Tuple
+
+from shared import taxonomy
+
+STOPWORDS = {
+    "and","or","with","the","to","a","in","for","of","on","at","is","are",
+    "be","as","by","from","an","that","this","it","you","your","we","our",
+    "will","can","able","etc","using","use","about","into","per","across",
+    "such","via","over","under","within","their","they","them"
+}
+
+_TOKEN_RE = re.compile(r"\b[^\W_]+\b")
+_STRIP_RE = re.compile(r"[^a-z0-9+#.\- ]")
+# punctuation that always ends a token ("_" is a word character, so not here)
+_EDGE_PUNCT = string.punctuation.replace("_", "")
+
+
+def normalize_token(tok: str, normalize_map: Optional[Dict[str, str]] = None) -> str:
+    t = tok.lower().strip()
+    t = _STRIP_RE.sub("", t)
+    if normalize_map is None:
+        normalize_map = taxonomy.current().normalize
+    t = normalize_map.get(t, t)
+    return t
+
+def _keep(term: str) -> bool:
+    return len(term) > 2 and term not in STOPWORDS
+
+def _ngram_ok(term: str) -> bool:
+    # multi-word normalizations ("power bi") must pass the filter word by word
+    return all(_keep(w) for w in term.split())
+
+def _terms(text: str) -> List[str]:
+    """
+    The normalized, filtered unigram stream. Tokens never span whitespace,
+    so each distinct whitespace chunk is tokenized and normalized once; a
+    chunk that is plain ASCII alphanumerics once edge punctuation is
+    stripped is its own token and skips the regex.
+    """
+    norm = taxonomy.current().normalize
+    chunks = text.lower().split()
+    chunk_terms: Dict[str, List[str]] = {}
+    for chunk in dict.fromkeys(chunks):
+        core = chunk.strip(_EDGE_PUNCT)
+        terms = []
+        for tok in ((core,) if core.isascii() and core.isalnum() else _TOKEN_RE.findall(chunk)):
+            # regex tokens are lowercase alphanumerics already: only non-ASCII ones need stripping
+            t = norm.get(tok, tok) if tok.isascii() else normalize_token(tok, norm)
+            if _keep(t):
+                terms.append(t)
+        chunk_terms[chunk] = terms
+    return list(chain.from_iterable(map(chunk_terms.__getitem__, chunks)))
+
+def extract_keywords_blocks(text: str, max_n: int = 2) -> Tuple[Set[str], Counter]:
+    """
+    Extracts unigrams + simple bigrams (trigrams with max_n=3), filters
+    stopwords/numbers, returns unique keyword set and a frequency Counter
+    for weighting.
+    """
+    if not text:
+        return set(), Counter()
+
+    terms = _terms(text)
+    freq = Counter(terms)
+    # Terms whose words fail the filter ("power bi" -> "bi") may not appear inside
+    # n-grams: they split the stream into runs and n-grams are taken within runs
+    bad = {t for t in freq if " " in t and not _ngram_ok(t)}
+    runs = [terms]
+    if bad:
+        runs, run = [], []
+        for t in terms:
+            if t in bad:
+                runs.append(run)
+                run = []
+            else:
+                run.append(t)
+        runs.append(run)
+    for n in range(2, max_n + 1):
+        for run in runs:
+            freq.update(map(" ".join, zip(*(run[k:] for k in range(n)))))
+    return set(freq), freq
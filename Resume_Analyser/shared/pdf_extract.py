@@ -0,0 +1,314 @@
+"""
+PDF text extraction shared by the frontend (views.analysis.read_pdf) and the
+backend (pipeline.extract_text), so both sides get identical text for a file.
+
+Pages are extracted one by one with the first backend in PDF_BACKENDS that
+returns usable text; a backend that raises, times out, runs out of memory
+or returns nothing / glyph-id garbage hands the page to the next one:
+
+  "pdfminer"   - pdfminer.six layout analysis of the single page (what the
+                 backend always used; ~2.5x faster than pdfplumber)
+  "pdfplumber" - pdfminer objects with pdfplumber's own text assembly
+  "pypdf"      - PyPDF2, an independent parser; rescues pages the others
+                 reject, and by far the fastest (PDF_BACKENDS=pypdf,...)
+
+Documents of PDF_PARALLEL_MIN_PAGES pages or more are split into page
+ranges across a process pool (PDF_WORKERS). Each page runs under a
+PDF_PAGE_TIMEOUT_S alarm and an address-space cap of PDF_PAGE_MEMORY_MB
+above the process's current size. Both guards need POSIX and the main
+thread, which pool workers always are; callers on other threads (Streamlit
+scripts) therefore always go through the pool.
+
+Output goes through normalize_text and pages are joined by a blank line,
+whatever backend produced them.
+"""
+import io
+import os
+import re
+import signal
+import threading
+import unicodedata
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: no address-space cap
+    resource = None
+
+# Stop PDFs after this many pages so huge files can't stall a worker
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "20"))
+BACKENDS = tuple(b.strip() for b in os.getenv("PDF_BACKENDS", "pdfminer,pdfplumber,pypdf").split(",") if b.strip())
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "4"))
+PAGE_TIMEOUT_S = float(os.getenv("PDF_PAGE_TIMEOUT_S", "10"))
+PAGE_MEMORY_MB = int(os.getenv("PDF_PAGE_MEMORY_MB", "512"))
+
+
+@dataclass
+class Page:
+    number: int                  # 0-based
+    text: str
+    backend: Optional[str]       # None if every backend failed
+    errors: Optional[List[str]] = None
+
+
+# ---- Normalization ----
+_LIGATURES = {"ﬀ": "ff", "ﬁ": "fi", "ﬂ": "fl", "ﬃ": "ffi", "ﬄ": "ffl"}
+_CID = re.compile(r"\(cid:\d+\)")
+_SPACES = re.compile(r"[ \t\u00a0\u2000-\u200b\u202f\u205f\u3000]+")
+
+def normalize_text(text: str) -> str:
+    """
+    NFKC, ligatures and odd spaces folded, glyph ids dropped, each line
+    stripped, runs of blank lines collapsed to one.
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    for lig, plain in _LIGATURES.items():
+        text = text.replace(lig, plain)
+    text = _CID.sub("", text).replace("\r\n", "\n").replace("\r", "\n").replace("\x0c", "\n")
+    lines = [_SPACES.sub(" ", line).strip() for line in text.split("\n")]
+    out, blank = [], False
+    for line in lines:
+        if line or not blank:
+            out.append(line)
+        blank = not line
+    return "\n".join(out).strip()
+
+def _usable(raw: str) -> bool:
+    # (cid:NN) runs mean the font has no unicode map: treat as unreadable
+    text = (raw or "").strip()
+    if not text:
+        return False
+    cid = sum(len(m) for m in _CID.findall(text))
+    return cid < 0.3 * len(text)
+
+
+# ---- Backends (one open document per backend per page range) ----
+class _Document:
+    def __init__(self, data: bytes):
+        self.data = data
+        self._plumber = None
+        self._pypdf = None
+        self._miner = None       # (resource manager, page iterator)
+        self._miner_next = 0     # number of the page the iterator yields next
+
+    def page(self, backend: str, n: int) -> str:
+        if backend == "pdfplumber":
+            if self._plumber is None:
+                import pdfplumber
+                self._plumber = pdfplumber.open(io.BytesIO(self.data))
+            page = self._plumber.pages[n]
+            try:
+                return page.extract_text() or ""
+            finally:
+                page.close()  # drop the page's cached layout objects
+        if backend == "pdfminer":
+            return self._pdfminer_page(n)
+        if backend == "pypdf":
+            if self._pypdf is None:
+                from PyPDF2 import PdfReader
+                self._pypdf = PdfReader(io.BytesIO(self.data))
+            return self._pypdf.pages[n].extract_text() or ""
+        raise ValueError(f"unknown PDF backend {backend!r}")
+
+    def _pdfminer_page(self, n: int) -> str:
+        # What pdfminer.high_level.extract_text does for one page, but the document
+        # is parsed once and its pages walked in order (ranges ask for them in order)
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+        if self._miner is None or n < self._miner_next:
+            doc = PDFDocument(PDFParser(io.BytesIO(self.data)))
+            self._miner, self._miner_next = (PDFResourceManager(caching=True), PDFPage.create_pages(doc)), 0
+        rsrcmgr, pages = self._miner
+        page = None
+        while self._miner_next <= n:
+            page = next(pages, None)
+            self._miner_next += 1
+            if page is None:
+                return ""
+        out = io.StringIO()
+        device = TextConverter(rsrcmgr, out, laparams=LAParams())
+        try:
+            PDFPageInterpreter(rsrcmgr, device).process_page(page)
+        finally:
+            device.close()
+        return out.getvalue()
+
+    def close(self):
+        if self._plumber is not None:
+            self._plumber.close()
+
+
+def page_count(data: bytes) -> int:
+    try:
+        from PyPDF2 import PdfReader
+        return len(PdfReader(io.BytesIO(data)).pages)
+    except Exception:
+        try:
+            import pdfplumber
+            with pdfplumber.open(io.BytesIO(data)) as pdf:
+                return len(pdf.pages)
+        except Exception:
+            return 0
+
+
+# ---- Per-page guards ----
+class PageTimeout(Exception):
+    pass
+
+def _on_alarm(signum, frame):
+    raise PageTimeout()
+
+def _vm_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+class _Guard:
+    """
+    Alarm after timeout_s and RLIMIT_AS at current size + memory_mb, both
+    restored on exit. A no-op off the main thread or off POSIX.
+    """
+
+    def __init__(self, timeout_s: float, memory_mb: int):
+        self.active = threading.current_thread() is threading.main_thread() and hasattr(signal, "setitimer")
+        self.timeout_s, self.memory_mb = timeout_s, memory_mb
+        self._limit = None
+
+    def __enter__(self):
+        if not self.active:
+            return self
+        if self.timeout_s > 0:
+            self._handler = signal.signal(signal.SIGALRM, _on_alarm)
+            signal.setitimer(signal.ITIMER_REAL, self.timeout_s)
+        vm = _vm_bytes()
+        if resource is not None and self.memory_mb > 0 and vm:
+            self._limit = resource.getrlimit(resource.RLIMIT_AS)
+            cap = vm + self.memory_mb * 2**20
+            if self._limit[1] == resource.RLIM_INFINITY or cap < self._limit[1]:
+                resource.setrlimit(resource.RLIMIT_AS, (cap, self._limit[1]))
+            else:
+                self._limit = None
+        return self
+
+    def __exit__(self, *exc):
+        if not self.active:
+            return False
+        if self.timeout_s > 0:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._handler)
+        if self._limit is not None:
+            resource.setrlimit(resource.RLIMIT_AS, self._limit)
+        return False
+
+
+def _extract_range(data: bytes, start: int, stop: int, backends=BACKENDS,
+                   timeout_s: float = PAGE_TIMEOUT_S, memory_mb: int = PAGE_MEMORY_MB) -> List[Page]:
+    """
+    Pool entry point: pages [start, stop) of one document, each with the
+    first backend that yields usable text.
+    """
+    doc, pages = _Document(data), []
+    try:
+        for n in range(start, stop):
+            page, fallback = None, None
+            errors = []
+            for backend in backends:
+                try:
+                    with _Guard(timeout_s, memory_mb):
+                        raw = doc.page(backend, n)
+                except PageTimeout:
+                    errors.append(f"{backend}: timed out after {timeout_s:g}s")
+                    continue
+                except MemoryError:
+                    errors.append(f"{backend}: over {memory_mb} MB")
+                    continue
+                except Exception as e:
+                    errors.append(f"{backend}: {type(e).__name__}: {e}")
+                    continue
+                if _usable(raw):
+                    page = Page(n, normalize_text(raw), backend, errors or None)
+                    break
+                errors.append(f"{backend}: no usable text")
+                if fallback is None and normalize_text(raw):
+                    fallback = Page(n, normalize_text(raw), backend, None)
+            if page is None:
+                page = fallback or Page(n, "", None, None)
+                page.errors = errors or None
+            pages.append(page)
+    finally:
+        doc.close()
+    return pages
+
+
+# ---- Process pool ----
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: callers (Streamlit, uvicorn) are multi-threaded, fork is unsafe there
+            _pool = ProcessPoolExecutor(max_workers=max(1, PDF_WORKERS),
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def shutdown():
+    _reset_pool()
+
+
+def extract_pages(data: bytes, max_pages: Optional[int] = MAX_PDF_PAGES,
+                  workers: Optional[int] = None) -> List[Page]:
+    """
+    Per-page text of a PDF, in page order. workers=1 extracts in this
+    process (guards need the main thread); default PDF_WORKERS.
+    """
+    n = page_count(data)
+    if max_pages is not None:
+        n = min(n, max_pages)
+    if n == 0:
+        return []
+    workers = PDF_WORKERS if workers is None else workers
+    on_main = threading.current_thread() is threading.main_thread()
+    if on_main and (workers <= 1 or n < PARALLEL_MIN_PAGES):
+        return _extract_range(data, 0, n)
+    # off the main thread the pool is used even for short documents: guards only work there
+    parts = max(1, min(n, 2 * max(1, workers)))
+    bounds = [round(i * n / parts) for i in range(parts + 1)]
+    ranges = [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+    try:
+        pool = _get_pool()
+        futures = [pool.submit(_extract_range, data, a, b) for a, b in ranges]
+        return [page for f in futures for page in f.result()]
+    except BrokenProcessPool:
+        # a worker died (hard crash / OOM kill): rebuild the pool next time, finish unguarded here
+        _reset_pool()
+        return _extract_range(data, 0, n)
+
+def extract_pdf(data: bytes, max_pages: Optional[int] = MAX_PDF_PAGES, workers: Optional[int] = None) -> str:
+    """
+    Normalized text of a PDF, pages joined by a blank line ("" if unreadable).
+    """
+    try:
+        pages = extract_pages(data, max_pages, workers)
+    except Exception:
+        return ""
+    return "\n\n".join(p.text for p in pages if p.text)
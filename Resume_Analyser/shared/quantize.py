@@ -0,0 +1,110 @@
+"""
+Compact embedding storage with similarity computed on the stored form.
+
+  "float32" - as is (4 bytes/dim)
+  "float16" - half precision (2 bytes/dim)
+  "int8"    - symmetric per-vector int8 codes plus one float32 scale per
+              vector (1 byte/dim + 4 bytes); the scale is chosen so the
+              decoded vector keeps the original norm, so cosines of unit
+              vectors stay on the same scale as float32
+
+Dot products upcast one block of codes at a time and apply the scales to
+the result, so a full float32 copy of the matrix is never built. top_k
+goes further and keeps only a running top-k per query, so the (queries x
+rows) similarity matrix is never built either.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+_BLOCK = 8192
+
+
+def _row_top_k(scores: np.ndarray, idx: np.ndarray, k: int):
+    """
+    Row-wise top-k of (m, n) scores with their idx, sorted best first.
+    """
+    if k < scores.shape[1]:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores, idx = np.take_along_axis(scores, part, 1), np.take_along_axis(idx, part, 1)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(scores, order, 1), np.take_along_axis(idx, order, 1)
+
+def merge_top_k(scores_a: np.ndarray, idx_a: np.ndarray, scores_b: np.ndarray, idx_b: np.ndarray, k: int):
+    """
+    Merge two per-row candidate sets (m, ka) and (m, kb) into the row-wise top-k.
+    """
+    return _row_top_k(np.concatenate([scores_a, scores_b], axis=1),
+                      np.concatenate([idx_a, idx_b], axis=1), k)
+
+
+def quantize_int8(x: np.ndarray):
+    """
+    (n, d) float -> (int8 codes, float32 per-row scales).
+    """
+    x = np.asarray(x, dtype=np.float32)
+    peak = np.abs(x).max(axis=1, keepdims=True)
+    codes = np.rint(x * (127.0 / np.maximum(peak, 1e-12))).astype(np.int8)
+    code_norm = np.linalg.norm(codes.astype(np.float32), axis=1)
+    scales = np.linalg.norm(x, axis=1) / np.maximum(code_norm, 1e-12)
+    return codes, scales.astype(np.float32)
+
+
+@dataclass
+class Quantized:
+    codes: np.ndarray
+    scales: Optional[np.ndarray] = None  # int8 only
+
+    @property
+    def precision(self) -> str:
+        return "int8" if self.scales is not None else str(self.codes.dtype)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def dot(self, queries: np.ndarray) -> np.ndarray:
+        """
+        (m, d) float queries -> (m, n) dot products against the stored rows.
+        """
+        q = np.asarray(queries, dtype=np.float32).reshape(-1, self.codes.shape[1])
+        out = np.empty((len(q), len(self.codes)), dtype=np.float32)
+        for s in range(0, len(self.codes), _BLOCK):
+            out[:, s:s + _BLOCK] = self._block_dot(q, s, s + _BLOCK)
+        return out
+
+    def _block_dot(self, q: np.ndarray, start: int, stop: int) -> np.ndarray:
+        out = q @ self.codes[start:stop].astype(np.float32).T
+        if self.scales is not None:
+            out *= self.scales[start:stop]
+        return out
+
+    def top_k(self, queries: np.ndarray, k: int, block: int = _BLOCK):
+        """
+        (m, d) queries -> (scores, idx), each (m, min(k, n)): the k best rows
+        per query, best first. Streams over blocks of rows with a running
+        top-k; memory is O(m * (k + block)).
+        """
+        q = np.asarray(queries, dtype=np.float32).reshape(-1, self.codes.shape[1])
+        k = min(k, len(self.codes))
+        scores = np.empty((len(q), 0), dtype=np.float32)
+        idx = np.empty((len(q), 0), dtype=np.int64)
+        for s in range(0, len(self.codes), block):
+            sims = self._block_dot(q, s, s + block)
+            cols = np.broadcast_to(np.arange(s, s + sims.shape[1]), sims.shape)
+            scores, idx = merge_top_k(scores, idx, *_row_top_k(sims, cols, k), k)
+        return scores, idx
+
+
+def quantize(x: np.ndarray, precision: str = "int8") -> Quantized:
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {PRECISIONS}, got {precision!r}")
+    x = np.asarray(x, dtype=np.float32)
+    if precision == "int8":
+        return Quantized(*quantize_int8(x.reshape(len(x), -1)))
+    return Quantized(x.astype(precision))
@@ -0,0 +1,79 @@
+"""
+Single-pass skill matcher over a token trie.
+
+Synonyms and text are tokenized the same way, so matches always fall on
+word boundaries ("sql" does not match inside "nosql"). At every token the
+trie is walked as far as it goes and the longest synonym wins, so the
+scan is one pass over the text regardless of taxonomy size.
+
+Only synonyms are matched; a skill's own key ("ml", "cloud") counts only
+when it is listed among its synonyms.
+"""
+import re
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# words, keeping in-word "+", "#", "." and "-" (c++, c#, node.js, scikit-learn)
+TOKEN_RE = re.compile(r"[a-z0-9+#]+(?:[.\-][a-z0-9+#]+)*")
+
+_END = ""  # trie key holding the (skill, synonym) that ends at this node
+
+
+class SkillMatch(NamedTuple):
+    skill: str
+    term: str
+    start: int
+    end: int
+
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    return [(m.group(), m.start(), m.end()) for m in TOKEN_RE.finditer(text.lower())]
+
+
+class SkillMatcher:
+    def __init__(self, taxonomy: Dict[str, List[str]]):
+        self.skills = list(taxonomy)
+        self._trie: dict = {}
+        for skill, synonyms in taxonomy.items():
+            for term in synonyms:
+                toks = [t for t, _, _ in tokenize(term)]
+                if not toks:
+                    continue
+                node = self._trie
+                for tok in toks:
+                    node = node.setdefault(tok, {})
+                node.setdefault(_END, (skill, " ".join(toks)))
+
+    def find(self, text: str) -> List[SkillMatch]:
+        """
+        Leftmost-longest, non-overlapping matches with character offsets.
+        """
+        toks = tokenize(text or "")
+        out, i, n = [], 0, len(toks)
+        while i < n:
+            node, best, j = self._trie, None, i
+            while j < n:
+                node = node.get(toks[j][0])
+                if node is None:
+                    break
+                j += 1
+                if _END in node:
+                    best = (j, node[_END])
+            if best is None:
+                i += 1
+                continue
+            j, (skill, term) = best
+            out.append(SkillMatch(skill, term, toks[i][1], toks[j - 1][2]))
+            i = j
+        return out
+
+    def count(self, text: str) -> Counter:
+        return Counter(m.skill for m in self.find(text))
+
+    def extract(self, text: str, counts: Optional[Counter] = None) -> Dict[str, object]:
+        counts = self.count(text) if counts is None else counts
+        return {
+            "matched": [s for s in self.skills if counts[s]],
+            "missing": [s for s in self.skills if not counts[s]],
+            "counts": {s: counts[s] for s in self.skills if counts[s]},
+        }
@@ -0,0 +1,84 @@
+"""
+Skill taxonomy shared by the backend and the Streamlit frontend.
+
+taxonomy.json holds canonical skills with their synonyms ("skills") and
+token variants to normalize ("normalize"). It is compiled into an immutable
+TaxonomyIndex; when the file changes a new index is built off to the side
+and swapped in with a single assignment, so a caller holding an index
+never sees a half-built one. Grab current() once per request and use it
+throughout.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from shared.skill_matcher import SkillMatcher
+
+TAXONOMY_PATH = os.getenv("TAXONOMY_PATH", os.path.join(os.path.dirname(__file__), "taxonomy.json"))
+RELOAD_INTERVAL_S = float(os.getenv("TAXONOMY_RELOAD_S", "2"))
+
+
+class TaxonomyIndex:
+    def __init__(self, data: Dict[str, dict], version: int = 0):
+        self.version = version
+        # content digest: unlike version (a per-process reload counter) it is
+        # the same in every process and across restarts, so persisted data can key on it
+        self.fingerprint = hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+        self.skills: Dict[str, List[str]] = {k: list(v) for k, v in data.get("skills", {}).items()}
+        self.normalize: Dict[str, str] = {k.lower(): v.lower() for k, v in data.get("normalize", {}).items()}
+        self.matcher = SkillMatcher(self.skills)
+
+
+class Taxonomy:
+    """
+    Hot-reloading handle: stats the file at most every interval seconds and
+    rebuilds the index when its mtime/size change. A file that fails to
+    parse (e.g. caught mid-write) keeps the previous index.
+    """
+
+    def __init__(self, path: str = TAXONOMY_PATH, interval: float = RELOAD_INTERVAL_S):
+        self.path = path
+        self.interval = interval
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._checked = 0.0
+        self._index: Optional[TaxonomyIndex] = None
+        self._reload()
+
+    def _file_stamp(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def _reload(self):
+        stamp = self._file_stamp()
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = TaxonomyIndex(data, version=self.reloads + 1)
+        self._index, self._stamp = index, stamp  # atomic swap
+        self.reloads += 1
+
+    def current(self) -> TaxonomyIndex:
+        now = time.monotonic()
+        if now - self._checked >= self.interval and self._lock.acquire(blocking=False):
+            try:
+                self._checked = now
+                if self._file_stamp() != self._stamp:
+                    self._reload()
+            except (OSError, ValueError):
+                pass
+            finally:
+                self._lock.release()
+        return self._index
+
+
+_taxonomy: Optional[Taxonomy] = None
+
+def current() -> TaxonomyIndex:
+    global _taxonomy
+    if _taxonomy is None:
+        _taxonomy = Taxonomy()
+    return _taxonomy.current()
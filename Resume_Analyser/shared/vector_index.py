@@ -0,0 +1,285 @@
+"""
+Approximate nearest-neighbour index over unit-length embeddings (IVF, pure
+numpy, CPU only).
+
+Vectors live in a memory-mapped float16 (or int8 + per-row scale, see
+shared.quantize) matrix that grows by doubling.
+Once train_size vectors are stored, spherical k-means centroids split them
+into inverted lists and a query only scores the rows of the nprobe lists
+whose centroids are closest to it. Until then every row sits in a single
+list, so search is exact.
+
+Inserts go to the list of their nearest centroid; deletes free the row for
+the next insert. When the corpus outgrows the size the centroids were
+trained on (retrain_factor x), the next add() retrains them.
+
+Directory layout:
+  vectors.f16     (capacity, dim) float16 rows, or
+  vectors.i8      (capacity, dim) int8 codes + scales.f32 (capacity,)
+  centroids.npy   (nlist, dim) float32, absent until trained
+  assign.npy      inverted-list number of each row (-1 = free)
+  meta.json       dim, precision, capacity, row ids, trained size
+"""
+import json
+import math
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from shared.quantize import quantize_int8
+
+_CHUNK = 8192
+
+
+def _unit(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.maximum(np.linalg.norm(x, axis=-1, keepdims=True), 1e-12)
+
+def default_nlist(n: int) -> int:
+    return max(1, min(int(4 * math.sqrt(n)), n // 32))
+
+def kmeans(x: np.ndarray, k: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means (cosine), returns (k, dim) unit centroids.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = _unit(x[rng.choice(len(x), size=k, replace=False)])
+    for _ in range(iters):
+        assign = _nearest(x, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        empty = np.flatnonzero(np.bincount(assign, minlength=k) == 0)
+        sums[empty] = x[rng.choice(len(x), size=len(empty))]
+        centroids = _unit(sums)
+    return centroids
+
+def _nearest(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(len(x), dtype=np.int32)
+    for s in range(0, len(x), _CHUNK):
+        out[s:s + _CHUNK] = np.argmax(np.asarray(x[s:s + _CHUNK], dtype=np.float32) @ centroids.T, axis=1)
+    return out
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class VectorIndex:
+    def __init__(self, directory: str, dim: int, nprobe: int = 8, train_size: int = 2048,
+                 retrain_factor: float = 4.0, precision: str = "float16"):
+        """
+        precision ("float16" | "int8") applies to a new index; an existing
+        one keeps the precision it was created with.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.dim = dim
+        self.nprobe = max(1, nprobe)
+        self.train_size = max(1, train_size)
+        self.retrain_factor = retrain_factor
+        self._lock = threading.RLock()
+        meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                precision = json.load(f).get("precision", "float16")
+        if precision not in ("float16", "int8"):
+            raise ValueError(f"precision must be float16 or int8, got {precision!r}")
+        self.precision = precision
+        self._dtype = np.float16 if precision == "float16" else np.int8
+        self._data_path = os.path.join(directory, "vectors.f16" if precision == "float16" else "vectors.i8")
+        self._scales_path = os.path.join(directory, "scales.f32")
+        self._matrix = None
+        self._scales = None
+        self._capacity = 0
+        self._row_ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_on = 0
+        self._lists: Optional[List[np.ndarray]] = None
+        self._open()
+
+    # ---- storage ----
+    def _open(self):
+        meta_path = os.path.join(self.directory, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["dim"] != self.dim:
+                raise ValueError(f"{self.directory} holds {meta['dim']}-d vectors, not {self.dim}-d")
+            self._capacity = meta["capacity"]
+            self._row_ids = meta["row_ids"] + [None] * (self._capacity - len(meta["row_ids"]))
+            self._trained_on = meta.get("trained_on", 0)
+            self._assign = np.load(os.path.join(self.directory, "assign.npy"))
+            cpath = os.path.join(self.directory, "centroids.npy")
+            self._centroids = np.load(cpath) if os.path.exists(cpath) else None
+            self._map(self._capacity)
+        else:
+            self._resize(1024)
+        self._rows = {doc_id: i for i, doc_id in enumerate(self._row_ids) if doc_id is not None}
+        self._free = [i for i in range(self._capacity - 1, -1, -1) if self._row_ids[i] is None]
+
+    def _resize(self, capacity: int):
+        if self._matrix is not None:
+            self._flush()
+            self._matrix = self._scales = None
+        with open(self._data_path, "r+b" if self._capacity else "wb") as f:
+            f.truncate(capacity * self.dim * np.dtype(self._dtype).itemsize)
+        if self.precision == "int8":
+            with open(self._scales_path, "r+b" if self._capacity else "wb") as f:
+                f.truncate(capacity * 4)
+        self._free = list(range(capacity - 1, self._capacity - 1, -1)) + self._free
+        self._row_ids += [None] * (capacity - self._capacity)
+        self._assign = np.concatenate((self._assign, np.full(capacity - self._capacity, -1, dtype=np.int32)))
+        self._capacity = capacity
+        self._map(capacity)
+
+    def _map(self, capacity: int):
+        self._matrix = np.memmap(self._data_path, dtype=self._dtype, mode="r+", shape=(capacity, self.dim))
+        if self.precision == "int8":
+            self._scales = np.memmap(self._scales_path, dtype=np.float32, mode="r+", shape=(capacity,))
+
+    def _flush(self):
+        self._matrix.flush()
+        if self._scales is not None:
+            self._scales.flush()
+
+    def _write(self, rows: np.ndarray, vectors: np.ndarray):
+        if self.precision == "int8":
+            self._matrix[rows], self._scales[rows] = quantize_int8(vectors)
+        else:
+            self._matrix[rows] = vectors.astype(np.float16)
+
+    def _vectors(self, rows: np.ndarray) -> np.ndarray:
+        x = np.asarray(self._matrix[rows], dtype=np.float32)
+        return x if self._scales is None else x * self._scales[rows][:, None]
+
+    def save(self):
+        with self._lock:
+            self._flush()
+            np.save(os.path.join(self.directory, "assign.npy"), self._assign)
+            if self._centroids is not None:
+                np.save(os.path.join(self.directory, "centroids.npy"), self._centroids)
+            tmp = os.path.join(self.directory, "meta.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"dim": self.dim, "precision": self.precision, "capacity": self._capacity,
+                           "row_ids": self._row_ids, "trained_on": self._trained_on}, f)
+            os.replace(tmp, os.path.join(self.directory, "meta.json"))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._rows
+
+    # ---- updates ----
+    def add(self, ids: Iterable[str], vectors: np.ndarray):
+        """
+        Insert or replace vectors by id; normalizes them to unit length.
+        """
+        ids = list(ids)
+        vectors = _unit(np.asarray(vectors).reshape(len(ids), self.dim))
+        with self._lock:
+            rows = np.empty(len(ids), dtype=np.int64)
+            for j, doc_id in enumerate(ids):
+                row = self._rows.get(doc_id)
+                if row is None:
+                    if not self._free:
+                        self._resize(self._capacity * 2)
+                    row = self._free.pop()
+                    self._rows[doc_id], self._row_ids[row] = row, doc_id
+                rows[j] = row
+            self._write(rows, vectors)
+            self._assign[rows] = 0 if self._centroids is None else _nearest(vectors, self._centroids)
+            self._lists = None
+            n = len(self._rows)
+            if n >= self.train_size and (self._centroids is None or n > self.retrain_factor * self._trained_on):
+                self.train()
+
+    def remove(self, ids: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for doc_id in ids:
+                row = self._rows.pop(doc_id, None)
+                if row is not None:
+                    self._row_ids[row] = None
+                    self._assign[row] = -1
+                    self._free.append(row)
+                    removed += 1
+            if removed:
+                self._lists = None
+        return removed
+
+    def train(self, nlist: Optional[int] = None, sample: int = 50_000, iters: int = 10):
+        """
+        (Re)compute the centroids on a sample of stored vectors and reassign every row.
+        """
+        with self._lock:
+            live = np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+            if not len(live):
+                return
+            live.sort()
+            nlist = min(nlist or default_nlist(len(live)), len(live))
+            rng = np.random.default_rng(0)
+            picked = np.sort(rng.choice(live, size=min(sample, len(live)), replace=False))
+            self._centroids = kmeans(self._vectors(picked), nlist, iters)
+            for s in range(0, len(live), _CHUNK):
+                self._assign[live[s:s + _CHUNK]] = _nearest(self._vectors(live[s:s + _CHUNK]), self._centroids)
+            self._trained_on = len(live)
+            self._lists = None
+
+    # ---- search ----
+    def _inverted_lists(self) -> List[np.ndarray]:
+        if self._lists is None:
+            nlist = 1 if self._centroids is None else len(self._centroids)
+            order = np.argsort(self._assign, kind="stable")
+            bounds = np.searchsorted(self._assign[order], np.arange(nlist + 1))
+            self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(nlist)]
+        return self._lists
+
+    def _rank(self, q: np.ndarray, rows: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        scores = np.asarray(self._matrix[rows], dtype=np.float32) @ q
+        if self._scales is not None:
+            scores *= self._scales[rows]
+        top = _top_k(scores, k)
+        return [(self._row_ids[rows[i]], float(scores[i])) for i in top]
+
+    def search(self, queries: np.ndarray, k: int = 10, nprobe: Optional[int] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Top-k (id, cosine) per query row, best first, scanning nprobe lists
+        (default self.nprobe; clamped to 1..number of lists).
+        """
+        queries = _unit(np.asarray(queries).reshape(-1, self.dim))
+        with self._lock:
+            lists = self._inverted_lists()
+            if self._centroids is None:
+                return [self._rank(q, lists[0], k) for q in queries]
+            nprobe = max(1, min(self.nprobe if nprobe is None else nprobe, len(lists)))
+            probes = np.argpartition(-(queries @ self._centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+            return [self._rank(q, np.concatenate([lists[c] for c in p]), k) for q, p in zip(queries, probes)]
+
+    def exact_search(self, queries: np.ndarray, k: int = 10) -> List[List[Tuple[str, float]]]:
+        """
+        Brute-force baseline over every stored vector.
+        """
+        queries = _unit(np.asarray(queries).reshape(-1, self.dim))
+        with self._lock:
+            rows = np.flatnonzero(self._assign >= 0)
+            return [self._rank(q, rows, k) for q in queries]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "vectors": len(self._rows),
+            "capacity": self._capacity,
+            "nlist": 0 if self._centroids is None else len(self._centroids),
+            "nprobe": self.nprobe,
+            "trained_on": self._trained_on,
+            "precision": self.precision,
+            "bytes": self._matrix.nbytes + (0 if self._scales is None else self._scales.nbytes),
+        }